@@ -0,0 +1,70 @@
+"""Benchmarks the contraction hierarchy behind find_blended_path against plain
+Dijkstra's Algorithm on the same blended weights, on the bundled January 2024 data
+and on synthetic networks of 10k+ airports. Every route cost is checked against
+the one Dijkstra finds.
+
+    python benchmarks/bench_blended.py [queries]
+"""
+import sys
+import time
+import numpy as np
+from common import january_frame, synthetic_network
+from contraction import ContractionHierarchy
+from pathfinder import Pathfinder
+from route_graph import RouteGraph
+
+BLENDS = [0.0, 0.3, 0.7, 1.0]
+
+
+def blended_graph(graph, reliability):
+    """Returns graph with the blended cost of ContractionHierarchy.customize() as
+    its cancellation rate and no delay, for dijkstra() with index 0"""
+    scales = [array.mean() if len(array) and array.mean() > 0 else 1.0
+              for array in graph.weights]
+    cost = reliability * graph.cancel / scales[0] + (1 - reliability) * graph.delay / scales[1]
+    return RouteGraph(graph.airports, graph.airlines, graph.offsets, graph.targets,
+                      cost, np.zeros(len(cost)), graph.airline_ids)
+
+
+def main(queries):
+    """Prints the preprocessing, customization and query times of the hierarchy,
+    and the query time of Dijkstra's Algorithm"""
+    networks = [('January 2024', january_frame()),
+                ('hub 10k airports', synthetic_network(10000, hubs=40, routes=2)),
+                # Random networks have no hubs to put at the top, so the shortcuts
+                # grow quickly with the number of routes
+                ('random 1k airports', synthetic_network(1000, routes=2))]
+    print(f'{"network":<20} {"prep":>8} {"customize":>10} {"query":>9} {"dijkstra":>9}'
+          '  same costs')
+    rng = np.random.default_rng(0)
+    for name, df in networks:
+        pathfinder = Pathfinder(df)
+        graph = pathfinder.network
+        start = time.perf_counter()
+        hierarchy = ContractionHierarchy(graph)
+        prep = time.perf_counter() - start
+        customize = query = dijkstra = 0.0
+        same = True
+        for reliability in BLENDS:
+            start = time.perf_counter()
+            hierarchy.customize(reliability)
+            customize += time.perf_counter() - start
+            blended = blended_graph(graph, reliability)
+            for _ in range(queries):
+                s, t = rng.integers(0, len(graph), 2).tolist()
+                start = time.perf_counter()
+                cost = hierarchy.query(s, t)[0]
+                query += time.perf_counter() - start
+                start = time.perf_counter()
+                expected = pathfinder.dijkstra(blended, s, 0, target=t)[2][0, t]
+                dijkstra += time.perf_counter() - start
+                same &= bool(np.isclose(cost, expected) or cost == expected == np.inf)
+        customize *= 1000 / len(BLENDS)
+        query *= 1000 / (len(BLENDS) * queries)
+        dijkstra *= 1000 / (len(BLENDS) * queries)
+        print(f'{name:<20} {prep:7.2f}s {customize:7.1f} ms {query:6.2f} ms {dijkstra:6.2f} ms'
+              f'  {same}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 25)
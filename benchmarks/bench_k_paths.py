@@ -0,0 +1,45 @@
+"""Benchmarks how k_shortest_paths scales in k, on the bundled January 2024 data
+and on a larger random synthetic network. Every query is between two airports
+that can reach each other.
+
+    python benchmarks/bench_k_paths.py [queries]
+"""
+import sys
+import time
+import numpy as np
+from common import january_frame, synthetic_network
+from pathfinder import Pathfinder
+
+KS = [1, 2, 5, 10, 20]
+
+
+def reachable_pairs(pathfinder, count, seed=0):
+    """Returns count random (s, t) airport id pairs where t can be reached from s"""
+    rng = np.random.default_rng(seed)
+    n = len(pathfinder.airports)
+    pairs = []
+    while len(pairs) < count:
+        s, t = rng.integers(0, n, 2).tolist()
+        if s != t and pathfinder.reachability.reachable(s, t):
+            pairs.append((s, t))
+    return pairs
+
+
+def main(queries):
+    """Prints the mean time of a query and the mean number of routes found for each k"""
+    networks = [('January 2024', january_frame()),
+                ('random 2000 airports', synthetic_network(2000, routes=4))]
+    for name, df in networks:
+        pathfinder = Pathfinder(df)
+        pairs = reachable_pairs(pathfinder, queries)
+        print(f'{name}, mean of {queries} queries')
+        for k in KS:
+            start = time.perf_counter()
+            found = [len(pathfinder.k_shortest_paths(pathfinder.adj_cancel, s, t, k))
+                     for s, t in pairs]
+            elapsed = (time.perf_counter() - start) * 1000 / queries
+            print(f'  k={k:<3} {elapsed:8.2f} ms  {np.mean(found):5.1f} routes')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30)
@@ -0,0 +1,72 @@
+"""Benchmarks building the graphs of the Pathfinder against the row by row builder
+it replaced, on the bundled January 2024 data and on scaled-up copies of it.
+Both builders must give the same best edge of every route.
+
+    python benchmarks/bench_pathfinder_build.py [times ...]
+"""
+import sys
+from common import january_frame, measure, scaled_frame
+from pathfinder import Pathfinder
+
+
+def legacy_adj_list(df, index):
+    """The row by row builder of the first version of the Pathfinder. Returns
+    {origin: {destination: [cancel_rate, average_delay_mins, airline_name]}}"""
+    adj = {}
+    for i in range(len(df)):
+        origin = df.loc[i, 'reporting_airport']
+        destination = df.loc[i, 'origin_destination']
+        cancel_rate = df.loc[i, 'flights_cancelled_percent']
+        average_delay_mins = df.loc[i, 'average_delay_mins']
+        airline_name = df.loc[i, 'airline_name']
+        thing = [cancel_rate, average_delay_mins, airline_name]
+
+        if origin not in adj:
+            adj[origin] = {destination: thing}
+        elif destination in adj[origin]:
+            if adj[origin][destination][index] > thing[index]:
+                adj[origin][destination] = thing
+            elif adj[origin][destination][index] == thing[index]\
+                    and adj[origin][destination][(index+1) % 2] > thing[(index+1) % 2]:
+                adj[origin][destination] = thing
+        else:
+            adj[origin][destination] = thing
+
+    for i in range(len(df)):
+        if df.loc[i, 'origin_destination'] not in adj:
+            adj[df.loc[i, 'origin_destination']] = {}
+    return adj
+
+
+def as_adj_list(graph):
+    """Returns a RouteGraph in the format of legacy_adj_list()"""
+    adj = {airport: {} for airport in graph.airports}
+    for u, airport in enumerate(graph.airports):
+        for i in range(graph.offsets[u], graph.offsets[u+1]):
+            adj[airport][graph.airports[graph.targets[i]]] = [
+                float(graph.cancel[i]), float(graph.delay[i]),
+                graph.airlines[graph.airline_ids[i]]]
+    return adj
+
+
+def main(scales):
+    """Prints the build time of both builders for every scale of the dataset"""
+    january = january_frame()
+    print(f'{"rows":>8} {"row by row":>12} {"vectorised":>12}  same graphs')
+    for times in scales:
+        df = scaled_frame(january, times) if times > 1 else january
+        legacy, _, expected = measure(lambda: [legacy_adj_list(df, 0),
+                                               legacy_adj_list(df, 1)], repeat=1)
+        pathfinder = Pathfinder(df)
+        current, _, graphs = measure(pathfinder.read_csv_to_graphs)
+        found = [as_adj_list(graphs[0]), as_adj_list(graphs[1])]
+        same = all(
+            {origin: {destination: [float(edge[0]), float(edge[1]), edge[2]]
+                      for destination, edge in routes.items()}
+             for origin, routes in adj.items()} == graph
+            for adj, graph in zip(expected, found))
+        print(f'{len(df):>8} {legacy:>9.0f} ms {current:>9.1f} ms  {same}')
+
+
+if __name__ == '__main__':
+    main([int(times) for times in sys.argv[1:]] or [1, 10])
@@ -0,0 +1,109 @@
+"""Benchmarks replotting the graph tabs with new data: a full replot (clearing the
+axes and plotting again with seaborn) against updating the artists in place, with
+and without drawing the figure. It uses the Agg backend, so no window is opened.
+After each in place update, the figure is compared with a fresh plot of the data.
+
+    python benchmarks/bench_replot.py [replots]
+"""
+import sys
+import time
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from common import SOURCE, scaled_frame  # noqa: E402
+from graphs import BarGraph, CorrGraph, DistributionGraph, GraphFactory, PieGraph  # noqa: E402
+from loader import DatasetLoader  # noqa: E402
+from model import Model  # noqa: E402
+
+
+class AggGraph:
+    """The plotting part of a graph tab on an Agg canvas, without any Tk widgets"""
+    set_bar_heights = GraphFactory.set_bar_heights
+
+    def __init__(self, graph_class):
+        self.update_artists = graph_class.update_artists.__get__(self)
+        self.fig, self.ax = plt.subplots(dpi=90)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.artists = None
+
+    def replot(self, data, title, in_place, draw=True):
+        """Plots the data, from scratch unless in_place"""
+        if not in_place:
+            self.artists = None
+        self.update_artists(data, title)
+        if draw:
+            self.canvas.draw()
+
+    def pixels(self):
+        """Returns a copy of the rendered RGBA pixels"""
+        return np.array(self.canvas.buffer_rgba())
+
+
+def graph_data(model):
+    """Returns the data of a few plots of every graph tab, from the busiest routes.
+    The bar graphs always compare three airlines, so they can be updated in place."""
+    routes = model.df.sort_values('number_flights_matched', ascending=False)
+    routes = routes[['airline_name', 'reporting_airport', 'origin_destination']]
+    routes = routes.drop_duplicates().head(6).itertuples(index=False)
+    routes = [tuple(route) for route in routes]
+    airlines = list(dict.fromkeys(route[0] for route in routes))
+    if len(airlines) < 3:
+        airlines = list(model.df['airline_name'].value_counts().index[:4])
+    return {
+        'Corr': (CorrGraph, [model.corr_data(airline) for airline in airlines]),
+        'Pie': (PieGraph, [model.pie_chart_data(airline) for airline in airlines]),
+        'Dist': (DistributionGraph, [model.distribution_data(*route) for route in routes]),
+        'Bar': (BarGraph, [model.bar_graph_data([airlines[(i + j) % len(airlines)]
+                                                 for j in range(3)], 'average_delay_mins')
+                           for i in range(len(airlines))]),
+    }
+
+
+def median_ms(graph, plots, replots, in_place, draw):
+    """Returns the median time of a replot in milliseconds"""
+    graph.replot(*plots[-1], in_place=False)
+    times = []
+    for i in range(replots):
+        data, title = plots[i % len(plots)]
+        start = time.perf_counter()
+        graph.replot(data, title, in_place, draw)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def identical(graph_class, plots):
+    """Returns True if updating in place renders the same pixels as a fresh plot"""
+    graph = AggGraph(graph_class)
+    graph.replot(*plots[-1], in_place=False)
+    same = True
+    for data, title in plots:
+        graph.replot(data, title, in_place=True)
+        fresh = AggGraph(graph_class)
+        fresh.replot(data, title, in_place=False)
+        same &= np.array_equal(graph.pixels(), fresh.pixels())
+        plt.close(fresh.fig)
+    plt.close(graph.fig)
+    return same
+
+
+def main(replots):
+    """Prints the median replot latency of every graph tab"""
+    raw = DatasetLoader(SOURCE).load()
+    for name, df in [('January 2024', raw), ('January 2024 x10', scaled_frame(raw, 10))]:
+        print(f'{name}, median of {replots} replots')
+        print(f'  {"graph":<6} {"full":>9} {"in place":>9}   without the draw:'
+              f' {"full":>8} {"in place":>9}  identical')
+        for graph_name, (graph_class, plots) in graph_data(Model(df)).items():
+            graph = AggGraph(graph_class)
+            times = [median_ms(graph, plots, replots, in_place, draw)
+                     for draw in [True, False] for in_place in [False, True]]
+            plt.close(graph.fig)
+            print(f'  {graph_name:<6} {times[0]:6.1f} ms {times[1]:6.1f} ms'
+                  f'                     {times[2]:5.1f} ms {times[3]:6.2f} ms'
+                  f'  {identical(graph_class, plots)}')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 19)
@@ -0,0 +1,78 @@
+"""Data and timing helpers shared by the benchmarks. Importing it puts the root
+of the project on the path, so the benchmarks can be run from anywhere with
+    python benchmarks/<benchmark>.py"""
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = os.path.join(ROOT, 'dataset', '202401_Punctuality_Statistics_Full_Analysis.csv')
+sys.path.insert(0, ROOT)
+
+from loader import DatasetLoader  # noqa: E402
+from model import Model  # noqa: E402
+
+WEIGHT_COLUMNS = ['flights_cancelled_percent', 'average_delay_mins']
+
+
+def january_frame() -> pd.DataFrame:
+    """Returns the bundled January 2024 dataset as the app sees it, only the rows
+    with flights"""
+    return Model(DatasetLoader(SOURCE).load()).df
+
+
+def scaled_frame(df: pd.DataFrame, times: int, seed: int = 0) -> pd.DataFrame:
+    """Returns times copies of df, each copy with its weights shuffled, so there
+    are times as many parallel routes with different weights"""
+    rng = np.random.default_rng(seed)
+    copies = []
+    for _ in range(times):
+        copy = df.copy()
+        for column in WEIGHT_COLUMNS:
+            copy[column] = rng.permutation(copy[column].to_numpy())
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def synthetic_network(airports: int, seed: int = 0, hubs: int = 0,
+                      routes: int = 3, airlines: int = 20) -> pd.DataFrame:
+    """Returns a random flight network with the columns the Pathfinder reads.
+
+    Every airport flies to routes random airports. If hubs is given, the network is
+    hub-and-spoke like a real one instead: every airport flies to and from routes of
+    the first hubs airports, and the hubs fly to each other."""
+    rng = np.random.default_rng(seed)
+    if hubs:
+        spokes = np.repeat(np.arange(hubs, airports), routes)
+        spoke_hubs = rng.integers(0, hubs, len(spokes))
+        hub_pairs = np.array([(a, b) for a in range(hubs) for b in range(hubs) if a != b],
+                             dtype=np.int64).reshape(-1, 2)
+        origins = np.concatenate([spokes, spoke_hubs, hub_pairs[:, 0]])
+        destinations = np.concatenate([spoke_hubs, spokes, hub_pairs[:, 1]])
+    else:
+        origins = np.repeat(np.arange(airports), routes)
+        destinations = (origins + rng.integers(1, airports, len(origins))) % airports
+    return pd.DataFrame({
+        'reporting_airport': [f'AIRPORT {i}' for i in origins],
+        'origin_destination': [f'AIRPORT {i}' for i in destinations],
+        'airline_name': [f'AIRLINE {i}' for i in rng.integers(0, airlines, len(origins))],
+        'flights_cancelled_percent': rng.gamma(1.0, 2.0, len(origins)).round(2),
+        'average_delay_mins': rng.gamma(2.0, 8.0, len(origins)).round(1),
+    })
+
+
+def measure(func, repeat: int = 5):
+    """Runs func repeat times.
+
+    Returns:
+        (best, median) time of a run in milliseconds, and the result of the last run
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times), float(np.median(times)), result
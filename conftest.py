@@ -0,0 +1 @@
+"""Lets pytest import the modules at the root of the project from the tests"""
@@ -0,0 +1,191 @@
+"""Customizable contraction hierarchy for routes with a blended cost"""
+import heapq
+import numpy as np
+
+
+class ContractionHierarchy:
+    """A customizable contraction hierarchy (CCH) over a RouteGraph.
+
+    The preprocessing only looks at which airports are connected. Airports are
+    contracted in minimum degree order and every pair of neighbours of a contracted
+    airport gets a shortcut, so the hierarchy works for any weights.
+
+    customize() then sets the weight of every edge and shortcut for a blend of
+    cancellation rate and average delay by going through the triangles of the
+    hierarchy level by level. A query is two small upward searches.
+    """
+    def __init__(self, graph) -> None:
+        self.graph = graph
+        n = len(graph)
+        neighbours = [set() for _ in range(n)]
+        for u, v in zip(graph.sources.tolist(), graph.targets.tolist()):
+            if u != v:
+                neighbours[u].add(v)
+                neighbours[v].add(u)
+
+        # Contract the airport with the least neighbours first
+        self.rank = np.full(n, -1, dtype=np.int64)
+        upward = [[] for _ in range(n)]
+        bag = [(len(neighbour), v) for v, neighbour in enumerate(neighbours)]
+        heapq.heapify(bag)
+        count = 0
+        while bag:
+            degree, v = heapq.heappop(bag)
+            if self.rank[v] >= 0 or degree != len(neighbours[v]):
+                continue
+            self.rank[v] = count
+            count += 1
+            upward[v] = list(neighbours[v])
+            for a in upward[v]:
+                neighbours[a].discard(v)
+            for a in upward[v]:
+                neighbours[a].update(b for b in upward[v] if b != a)
+                heapq.heappush(bag, (len(neighbours[a]), a))
+            neighbours[v] = set()
+
+        # Upward edges in CSR arrays, edge (v, a) goes from v to a higher ranked a
+        for v in range(n):
+            upward[v].sort(key=lambda a: self.rank[a])
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(up) for up in upward], out=self.offsets[1:])
+        self.targets = np.array([a for up in upward for a in up], dtype=np.int64)
+        self.lower = np.repeat(np.arange(n), np.diff(self.offsets))
+        edge_index = {(v, a): i for i, (v, a) in enumerate(zip(self.lower.tolist(),
+                                                                self.targets.tolist()))}
+
+        # Triangles (v, x, y) with v below x below y, grouped by the level of v
+        level = np.zeros(n, dtype=np.int64)
+        for v in np.argsort(self.rank).tolist():
+            for a in upward[v]:
+                level[a] = max(level[a], level[v] + 1)
+        triangles = []
+        for v in range(n):
+            for i, x in enumerate(upward[v]):
+                for y in upward[v][i+1:]:
+                    triangles.append((level[v], v, edge_index[(v, x)],
+                                      edge_index[(v, y)], edge_index[(x, y)]))
+        triangles.sort()
+        triangles = np.array(triangles, dtype=np.int64).reshape(-1, 5)
+        self.triangle_levels = np.searchsorted(triangles[:, 0],
+                                               np.arange(level.max() + 2 if n else 1))
+        self.triangle_middle = triangles[:, 1]
+        self.triangle_vx = triangles[:, 2]
+        self.triangle_vy = triangles[:, 3]
+        self.triangle_top = triangles[:, 4]
+
+        # The hierarchy edge of each graph edge, and whether it goes up
+        sources, targets = graph.sources, graph.targets
+        loops = sources == targets
+        self.base_up = self.rank[sources] < self.rank[targets]
+        low = np.where(self.base_up, sources, targets)
+        high = np.where(self.base_up, targets, sources)
+        self.base_edge = np.array([edge_index.get(pair, -1) for pair in
+                                   zip(low.tolist(), high.tolist())], dtype=np.int64)
+        self.base_edge[loops] = -1
+        self.reliability = None
+
+    def __len__(self) -> int:
+        """Returns the number of edges and shortcuts"""
+        return len(self.targets)
+
+    def customize(self, reliability: float) -> None:
+        """Sets the weights for a blend of reliability (cancellation rate) and average
+        delay. reliability = 1 only counts the cancellation rate and reliability = 0
+        only counts the delay. Both are divided by their mean first."""
+        graph = self.graph
+        scales = [array.mean() if len(array) and array.mean() > 0 else 1.0
+                  for array in graph.weights]
+        cost = reliability * graph.cancel / scales[0] + (1 - reliability) * graph.delay / scales[1]
+        self.up = np.full(len(self), np.inf)
+        self.down = np.full(len(self), np.inf)
+        self.up_via = np.full(len(self), -1, dtype=np.int64)
+        self.down_via = np.full(len(self), -1, dtype=np.int64)
+        self.up_edge = np.full(len(self), -1, dtype=np.int64)
+        self.down_edge = np.full(len(self), -1, dtype=np.int64)
+        usable = self.base_edge >= 0
+        for going_up, weight, edge in [(True, self.up, self.up_edge),
+                                       (False, self.down, self.down_edge)]:
+            chosen = np.flatnonzero(usable & (self.base_up == going_up))
+            self.__update(weight, edge, self.base_edge[chosen], cost[chosen], chosen)
+
+        for level in range(len(self.triangle_levels) - 1):
+            lo, hi = self.triangle_levels[level], self.triangle_levels[level+1]
+            vx, vy = self.triangle_vx[lo:hi], self.triangle_vy[lo:hi]
+            top = self.triangle_top[lo:hi]
+            triangles = np.arange(lo, hi)
+            # x -> v -> y goes up the top edge, y -> v -> x goes down
+            self.__update(self.up, self.up_via, top, self.down[vx] + self.up[vy], triangles)
+            self.__update(self.down, self.down_via, top, self.down[vy] + self.up[vx], triangles)
+        self.reliability = reliability
+
+    @staticmethod
+    def __update(weight, source, edges, candidates, origins):
+        """Lowers weight[edges] to the candidates where they are smaller and remembers
+        where the best candidate of each edge came from"""
+        order = np.lexsort((candidates, edges))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = edges[order][1:] != edges[order][:-1]
+        best = order[first]
+        better = candidates[best] < weight[edges[best]]
+        best = best[better]
+        weight[edges[best]] = candidates[best]
+        source[edges[best]] = origins[best]
+
+    def __upward_search(self, s, weight):
+        """Dijkstra's Algorithm from s that only goes up the hierarchy. Airports are
+        settled in order of rank because every edge goes to a higher rank."""
+        dist = {s: 0.0}
+        parent = {s: -1}
+        bag = [(self.rank[s], s)]
+        while bag:
+            _, u = heapq.heappop(bag)
+            lo, hi = self.offsets[u], self.offsets[u+1]
+            for e, v, w in zip(range(lo, hi), self.targets[lo:hi].tolist(),
+                               weight[lo:hi].tolist()):
+                new_dist = dist[u] + w
+                if v not in dist:
+                    heapq.heappush(bag, (self.rank[v], v))
+                elif new_dist >= dist[v]:
+                    continue
+                dist[v] = new_dist
+                parent[v] = e
+        return dist, parent
+
+    def query(self, s: int, t: int):
+        """Finds the cheapest route from airport id s to airport id t
+
+        Returns:
+            (cost, edges) where edges are the edge ids of the graph on the route,
+            (inf, None) if there is no route
+        """
+        forward, forward_parent = self.__upward_search(s, self.up)
+        backward, backward_parent = self.__upward_search(t, self.down)
+        best, meet = np.inf, -1
+        for v, dist in forward.items():
+            if v in backward and dist + backward[v] < best:
+                best, meet = dist + backward[v], v
+        if meet < 0:
+            return np.inf, None
+
+        route = []
+        v = meet
+        while forward_parent[v] >= 0:
+            e = forward_parent[v]
+            route = self.__unpack(e, True) + route
+            v = self.lower[e]
+        v = meet
+        while backward_parent[v] >= 0:
+            e = backward_parent[v]
+            route += self.__unpack(e, False)
+            v = self.lower[e]
+        return best, route
+
+    def __unpack(self, e, going_up):
+        """Returns the graph edges of hierarchy edge e, in the up or down direction"""
+        via = self.up_via[e] if going_up else self.down_via[e]
+        if via < 0:
+            return [int(self.up_edge[e] if going_up else self.down_edge[e])]
+        vx, vy = self.triangle_vx[via], self.triangle_vy[via]
+        if going_up:
+            return self.__unpack(vx, False) + self.__unpack(vy, True)
+        return self.__unpack(vy, False) + self.__unpack(vx, True)
@@ -1,24 +1,55 @@
 """The controller. Which controls interaction between view and model"""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from tkinter import messagebox
+from executor import TaskExecutor
 from pathfinder import Pathfinder
+from lru_cache import LRUCache
 
 
 class Controller:
-    """The Controller class"""
+    """The Controller class.
+
+    The Pathfinder is built in a worker thread as soon as the controller is created,
+    so the window is never frozen while the flight network is prepared. Route
+    queries made before it is ready wait on the Tk thread, one for each channel,
+    and are only handed to the executor once it is built. Graphs,
+    statistics and routes are computed by a TaskExecutor. Each tab is a channel of
+    it, so changing a selector drops the results of the requests made before.
+    The RGBA pixels of rendered graphs are kept, with the data and title they were
+    drawn from, in an LRUCache bounded by the bytes of the pixels. Plotting a graph
+    with options that were plotted before skips both the model and matplotlib."""
     def __init__(self, view, model):
         self.view = view
         self.model = model
-        self.pathfinder = None
+        self.executor = TaskExecutor(view)
+        self.render_cache = LRUCache(None, sizeof=lambda rendered: rendered[0].nbytes,
+                                     maxbytes=64 * 2**20)
+        self.__pathfinder_lock = Lock()
+        self.__waiting_queries = {}
+        self.__changed_selectors = {}
+        self.__refresh_scheduled = False
+        self.selector_stats = {'events': 0, 'refreshes': 0, 'model_calls': 0,
+                               'model_calls_saved': 0, 'redraws': 0, 'redraws_saved': 0}
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.pathfinder = executor.submit(self.build_pathfinder)
+        executor.shutdown(wait=False)
         self.feed_init_data()
+        self.pathfinder_ready()
 
     def run(self):
         """Run the app"""
         self.view.run()
+        self.executor.shutdown()
+
+    @staticmethod
+    def show_error(error):
+        """Show an error of a request"""
+        messagebox.showerror('Error', error)
 
     def feed_data(self, selector, filters=None):
         """Set the data of a certain combobox in a specific graph"""
         data = self.model.get_selector_data(selector.label, filters)
-        data.sort()
         selector.val = [''] + data
 
     def feed_init_data(self):
@@ -30,34 +61,111 @@ class Controller:
 
     def feed_desc_stat_init_data(self):
         """Fill the data for descriptive statistics combobox"""
-        data = data = self.model.get_selector_data('Origin', None)
-        data.sort()
+        data = self.model.get_selector_data('Origin', None)
         self.view.desc_stat.val = [''] + data
         self.view.desc_stat.binder(self.insert_desc_stat_text)
 
     def insert_desc_stat_text(self, airline=''):
         """Insert to the textbox"""
-        describe = self.model.desc_stat_data(airline)
-        self.view.desc_stat.insert_text(describe)
+        self.executor.submit('Descriptive Statistics', self.model.desc_stat_data, airline,
+                             callback=lambda data: self.view.desc_stat.insert_stats(*data),
+                             error=self.show_error)
 
     def feed_pathfinder_init_data(self):
         """Fill the data for 'find flight route' tab."""
         side_panel = self.view.path_ui.side_panel
         for selector in side_panel:
-            self.feed_data(selector)
+            if selector.label == 'Max Stops (Optional)':
+                selector.val = [''] + [str(stops) for stops in range(4)]
+            else:
+                self.feed_data(selector)
+        side_panel.bind_selector('Origin', self.path_origin_selected)
         side_panel.bind_button('Find Route', self.find_route)
+        side_panel.bind_scale('Reliability Weight (%)', self.find_blended_route)
+
+    def build_pathfinder(self):
+        """Builds the Pathfinder. Runs in the worker thread. The shortest path trees
+        are not precomputed, because none of the searches of the app read them."""
+        return Pathfinder(self.model.df)
+
+    def pathfinder_ready(self):
+        """Show that the flight routes are ready, or why they could not be built.
+        Tk is only used from the main thread, so the worker is polled from the event loop."""
+        if not self.pathfinder.done():
+            self.view.path_ui.set_status('Loading flight routes...')
+            self.view.after(100, self.pathfinder_ready)
+            return
+        error = self.pathfinder.exception()
+        self.view.path_ui.set_status('Failed to load flight routes' if error else '')
+        waiting, self.__waiting_queries = self.__waiting_queries, {}
+        if error:
+            messagebox.showerror('Error', error)
+            return
+        for channel, (callback, method, args) in waiting.items():
+            self.submit_path_query(channel, callback, method, *args)
+
+    def query_pathfinder(self, method: str, *args):
+        """Calls a method of the Pathfinder in a worker. It is only submitted once the
+        Pathfinder is built. Only one query runs at a time, because the Pathfinder
+        keeps state."""
+        pathfinder = self.pathfinder.result()
+        with self.__pathfinder_lock:
+            return getattr(pathfinder, method)(*args)
+
+    def submit_path_query(self, channel, callback, method, *args):
+        """Runs a Pathfinder query in the executor and shows that it's searching.
+        If the Pathfinder is still being built, the query replaces the waiting query
+        of its channel, so no worker is blocked until it is ready."""
+        if not self.pathfinder.done():
+            self.__waiting_queries[channel] = (callback, method, args)
+            return
+        def busy(searching):
+            self.view.path_ui.set_status('Searching...' if searching else '')
+        self.executor.submit(channel, self.query_pathfinder, method, *args,
+                             callback=callback, error=self.show_error, busy=busy)
+
+    def path_origin_selected(self, selector_name):
+        """Only allow the destinations that can be reached from the selected origin"""
+        side_panel = self.view.path_ui.side_panel
+        origin = side_panel.get_selector_options()['Origin']
+        destination = side_panel.get_selector('Destination')
+        if origin:
+            self.submit_path_query('Destinations', self.feed_reachable_airports,
+                                   'reachable_airports', origin)
+        else:
+            self.__waiting_queries.pop('Destinations', None)
+            self.executor.invalidate('Destinations')
+            self.feed_data(destination)
+
+    def feed_reachable_airports(self, airports):
+        """Fill the destinations that can be reached from the origin"""
+        side_panel = self.view.path_ui.side_panel
+        side_panel.get_selector('Destination').val = [''] + airports
 
     def find_route(self, event):
         """Find a flight route from airport A to airport B"""
+        options = self.view.path_ui.side_panel.get_selector_options()
+        max_legs = None
         try:
-            options = self.view.path_ui.side_panel.get_selector_options()
-            if not self.pathfinder:
-                self.pathfinder = Pathfinder(self.model.df)
-            flights = self.pathfinder.find_flight_path(options['Origin'],
-                                                       options['Destination'])
-            self.view.path_ui.create_subframes(flights)
+            if options['Max Stops (Optional)']:
+                max_legs = int(options['Max Stops (Optional)']) + 1
         except ValueError as v:
-            messagebox.showerror('Error', v)
+            self.show_error(v)
+            return
+        self.submit_path_query('Route', self.view.path_ui.create_frontier_subframes,
+                               'find_pareto_paths', options['Origin'],
+                               options['Destination'], max_legs)
+
+    def find_blended_route(self, reliability):
+        """Find the flight route with the least blend of cancellation rate and delay
+        whenever the reliability weight slider moves"""
+        options = self.view.path_ui.side_panel.get_selector_options()
+        if not options['Origin'] or not options['Destination'] \
+                or options['Origin'] == options['Destination']:
+            return
+        self.submit_path_query('Route', self.view.path_ui.create_subframes,
+                               'find_blended_path', options['Origin'],
+                               options['Destination'], reliability / 100)
 
     def feed_graphs_init_data(self):
         """filled the first selector of each graph with initial datas.
@@ -122,38 +230,112 @@ class Controller:
         if panel.history_box.values:
             self.activate_plot('')
         else:
+            self.executor.invalidate(self.view.get_current_tab_name())
             self.view.get_current_graph().reset_canvas()
 
     def activate_plot(self, event):
         """Plot the graph"""
-        try:
-            graph = self.view.get_current_graph()
-            panel = graph.side_panel
-            if panel.get_button_state('PLOT') == 'normal':
-                graph_name = self.view.get_current_tab_name()
-                options = panel.get_selector_options()
-                if panel.has_history_box:
-                    options['airline'] = panel.history_box.values
-                    options['compare'] = graph_name
-                data, title = self.model.get_graph_data(graph_name, options)
-                graph.plot_graph(data, title)
-        except Exception as e:
-            messagebox.showerror('Error', e)
+        graph = self.view.get_current_graph()
+        panel = graph.side_panel
+        if panel.get_button_state('PLOT') == 'normal':
+            graph_name = self.view.get_current_tab_name()
+            options = panel.get_selector_options()
+            if panel.has_history_box:
+                options['airline'] = list(panel.history_box.values)
+                options['compare'] = graph_name
+            key = self.render_key(graph, graph_name, options)
+            rendered = self.render_cache.lookup(key)
+            if rendered is not None:
+                self.executor.invalidate(graph_name)
+                graph.show_rendered(*rendered)
+                return
+            self.executor.submit(graph_name, self.model.get_graph_data, graph_name, options,
+                                 callback=lambda data: self.show_plot(graph, key, *data),
+                                 error=self.show_error, busy=graph.set_busy)
+
+    def render_key(self, graph, graph_name, options):
+        """Returns the key of a graph in the render cache: its name, its options,
+        the version of the dataset and the size of the canvas"""
+        values = tuple((name, tuple(sorted(set(value))) if isinstance(value, list) else value)
+                       for name, value in sorted(options.items()))
+        return graph_name, values, self.model.version, graph.canvas_size
+
+    def show_plot(self, graph, key, data, title):
+        """Plot the graph and keep its pixels in the render cache once it is drawn"""
+        def rendered(image):
+            size = (image.shape[1], image.shape[0])
+            self.render_cache.put(key[:-1] + (size,), (image, data, title))
+        graph.plot_graph(data, title)
+        graph.capture_next_draw(rendered)
 
     def selector_selected(self, selector_name):
-        """Fill the next selector with data after the first one is selected"""
-        panel = self.view.get_current_graph().side_panel
-        next_selector = panel.get_next_selector(selector_name)
-        if next_selector:
-            panel.disable_next_selectors(selector_name)
-            filters = panel.get_selector_options()
-            self.feed_data(next_selector, filters)
-            if panel.has_history_box:
-                panel.history_box.values = []
-                self.view.get_current_graph().reset_canvas()
-                panel.set_button_state('ADD', 'disabled')
-                panel.set_button_state('REMOVE', 'disabled')
-                self.feed_data(panel.get_selector('Airline'), filters)
+        """Remember that a selector of the current graph changed. The panels are
+        refreshed once the event loop is idle, so a cascade of changes, like the one
+        of a default view, costs one model query and at most one redraw per panel.
+        Pending plots of the tab are only dropped if the change refreshes the
+        selectors below it, so picking an airline keeps the plot that ADD started."""
+        graph = self.view.get_current_graph()
+        if graph.side_panel.get_next_selector(selector_name):
+            self.executor.invalidate(self.view.get_current_tab_name())
+        self.__changed_selectors.setdefault(graph, []).append(selector_name)
+        self.selector_stats['events'] += 1
+        if not self.__refresh_scheduled:
+            self.__refresh_scheduled = True
+            self.view.after_idle(self.refresh_selectors)
+
+    def refresh_selectors(self):
+        """Refresh every panel whose selectors changed since the last idle cycle"""
+        self.__refresh_scheduled = False
+        changed, self.__changed_selectors = self.__changed_selectors, {}
+        for graph, names in changed.items():
+            self.refresh_panel(graph, names)
+
+    def refresh_panel(self, graph, names: list):
+        """Fill the selectors below the changed ones with data, the same way as
+        handling every change in turn would. The changed selectors that directly
+        follow the first one keep their values, the selector after them is filled
+        and the rest are disabled."""
+        panel = graph.side_panel
+        labels = [selector.label for selector in panel]
+        first = min(labels.index(name) for name in names)
+        kept = []
+        for label in labels[first:]:
+            if label not in names:
+                break
+            kept.append(label)
+        # Changes that would have queried the model and reset the canvas one by one
+        events = sum(1 for name in names if panel.get_next_selector(name))
+        if not events:
+            return
+        values = {label: panel.get_selector(label).val for label in labels}
+        filters = dict.fromkeys(labels, '')
+        filters.update((label, values[label]) for label in labels[:first + 1])
+        next_selector = panel.get_next_selector(kept[-1])
+        filled = kept[1:] + ([next_selector.label] if next_selector else [])
+        queries = {}
+        for label in filled:
+            queries[label] = dict(filters)
+            filters[label] = values[label] if label in kept else ''
+        if panel.has_history_box:
+            queries['Airline'] = dict(filters)
+        data = self.model.get_selectors_data(queries)
+        panel.disable_next_selectors(labels[first])
+        for label, options in data.items():
+            selector = panel.get_selector(label)
+            selector.val = [''] + options
+            if label in kept:
+                selector.set_selected(values[label])
+        calls = events * (2 if panel.has_history_box else 1)
+        self.selector_stats['refreshes'] += 1
+        self.selector_stats['model_calls'] += 1
+        self.selector_stats['model_calls_saved'] += calls - 1
+        if panel.has_history_box:
+            panel.history_box.values = []
+            graph.reset_canvas()
+            panel.set_button_state('ADD', 'disabled')
+            panel.set_button_state('REMOVE', 'disabled')
+            self.selector_stats['redraws'] += 1
+            self.selector_stats['redraws_saved'] += events - 1
 
     def tab_selected(self, name):
         """Display Default View when tab is selected"""
@@ -177,25 +359,39 @@ class Controller:
 
     def display_storytelling(self):
         """Displays the story telling tab"""
-        datas = self.model.data_storytelling()
-        self.view.storytelling.plot_graph(datas)
+        if not self.view.storytelling.plotted:
+            self.executor.submit('Data Storytelling', self.model.data_storytelling,
+                                 callback=self.view.storytelling.plot_graph,
+                                 error=self.show_error)
 
     def dist_default_view(self):
         """Display the default view of distribution graph (histogram)"""
         graph = self.view.get_current_graph()
-        panel = graph.side_panel
         if not graph.initialised:
-            data, title, options = self.model.distribution_demo_data()
-            for option, selector in zip(options, panel):
-                selector.set_selected(option)
-                self.selector_selected(selector.label)
-            graph.plot_graph(data, title)
+            self.executor.submit('Dist', self.model.distribution_demo_data,
+                                 callback=lambda data: self.show_dist_default_view(graph, *data),
+                                 error=self.show_error, busy=graph.set_busy)
+
+    def show_dist_default_view(self, graph, data, title, options):
+        """Select the options of the default distribution graph and plot it"""
+        if self.view.get_current_graph() is not graph:
+            return
+        for option, selector in zip(options, graph.side_panel):
+            selector.set_selected(option)
+            self.selector_selected(selector.label)
+        graph.plot_graph(data, title)
 
     def bar_default_view(self, name):
         """Display default views of the bar graphs"""
         graph = self.view.get_current_graph()
         if not graph.initialised:
             graph.initialised = True
-            data, title, airlines = self.model.bar_graph_demo_data(name)
-            graph.side_panel.history_box.values = airlines
-            graph.plot_graph(data, title)
+            self.executor.submit(name, self.model.bar_graph_demo_data, name,
+                                 callback=lambda data: self.show_bar_default_view(graph, *data),
+                                 error=self.show_error, busy=graph.set_busy)
+
+    @staticmethod
+    def show_bar_default_view(graph, data, title, airlines):
+        """Fill the history box with the default airlines and plot them"""
+        graph.side_panel.history_box.values = airlines
+        graph.plot_graph(data, title)
@@ -3,6 +3,15 @@ import tkinter as tk
 from tkinter import ttk
 
 
+def format_stats(stats: dict) -> list:
+    """Returns one line of text for each statistic, with the names and the values
+    lined up in columns"""
+    names = max(len(name) for name in stats)
+    values = [f'{value:f}' for value in stats.values()]
+    width = max(len(value) for value in values)
+    return [f'{name:<{names}}    {value:>{width}}' for name, value in zip(stats, values)]
+
+
 class DescStat(tk.Frame):
     """A descriptive Statistics Tab."""
     def __init__(self, master=None, cnf={}, **kwargs):
@@ -39,6 +48,10 @@ class DescStat(tk.Frame):
         self.__textbox.insert(tk.END, text)
         self.__textbox['state'] = 'disabled'
 
+    def insert_stats(self, stats: dict, title: str):
+        """Show descriptive statistics in the textbox"""
+        self.insert_text('\n'.join([title] + format_stats(stats)))
+
     @property
     def val(self):
         """Get the value of the combobox"""
@@ -0,0 +1,11 @@
+"""The hash of a dataset file, which the caches saved next to it are keyed by"""
+import hashlib
+
+
+def file_digest(path: str) -> str:
+    """Returns the SHA-256 hash of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
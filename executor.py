@@ -0,0 +1,89 @@
+"""Runs slow work off the Tk thread and hands the results back to it"""
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskExecutor:
+    """Runs functions in a pool of worker threads and calls their callbacks on the
+    Tk thread, by polling the futures with after().
+
+    Every task belongs to a channel, such as the name of a tab. A newer task or a
+    call to invalidate() makes the older tasks of the same channel stale: the ones
+    that haven't started are cancelled and the results of the others are dropped,
+    so a slow old request never overwrites a newer one.
+    """
+    def __init__(self, widget, workers: int = 2, interval: int = 20) -> None:
+        self.widget = widget
+        self.interval = interval
+        self.dropped = 0
+        self.__pool = ThreadPoolExecutor(workers)
+        self.__generations = {}
+        self.__pending = []
+        self.__busy = {}
+        self.__polling = False
+
+    def submit(self, channel: str, func, *args, callback=None, error=None, busy=None):
+        """Runs func(*args) in a worker. callback(result) or error(exception) is then
+        called on the Tk thread, unless a newer task of the channel was submitted.
+        busy(True) is called when the channel starts working and busy(False) when
+        it has nothing left to do."""
+        generation = self.invalidate(channel)
+        if busy:
+            self.__busy[channel] = busy
+            busy(True)
+        future = self.__pool.submit(func, *args)
+        self.__pending.append((channel, generation, future, callback, error))
+        if not self.__polling:
+            self.__polling = True
+            self.widget.after(self.interval, self.__poll)
+        return future
+
+    def invalidate(self, channel: str) -> int:
+        """Makes every task of the channel stale, and cancels the ones that
+        haven't started yet. Returns the new generation of the channel."""
+        generation = self.__generations.get(channel, 0) + 1
+        self.__generations[channel] = generation
+        for pending_channel, _, future, _, _ in self.__pending:
+            if pending_channel == channel:
+                future.cancel()
+        return generation
+
+    def is_busy(self, channel: str) -> bool:
+        """Returns True if the channel has a task that is not finished"""
+        return any(pending[0] == channel for pending in self.__pending)
+
+    def __poll(self):
+        """Hands the results of the finished tasks to their callbacks"""
+        finished = [pending for pending in self.__pending if pending[2].done()]
+        self.__pending = [pending for pending in self.__pending if not pending[2].done()]
+        try:
+            for channel, generation, future, callback, error in finished:
+                self.__finish(channel, generation, future, callback, error)
+        finally:
+            if self.__pending:
+                self.widget.after(self.interval, self.__poll)
+            else:
+                self.__polling = False
+
+    def __finish(self, channel, generation, future, callback, error):
+        """Calls the callback of a finished task, or its error handler if the task or
+        the callback failed. Results of stale tasks are dropped."""
+        try:
+            if generation != self.__generations[channel] or future.cancelled():
+                self.dropped += 1
+            elif future.exception() is not None:
+                if error:
+                    error(future.exception())
+            elif callback:
+                try:
+                    callback(future.result())
+                except Exception as e:
+                    if not error:
+                        raise
+                    error(e)
+        finally:
+            if channel in self.__busy and not self.is_busy(channel):
+                self.__busy.pop(channel)(False)
+
+    def shutdown(self):
+        """Stops the workers after their current tasks, dropping the queued ones"""
+        self.__pool.shutdown(wait=False, cancel_futures=True)
@@ -1,16 +1,37 @@
 """Class for Graphs"""
 import tkinter as tk
 import abc
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg,
                                                NavigationToolbar2Tk)
 import seaborn as sns
+from descstat import format_stats
 from side_panel import SidePanel
 
 
+class GraphCanvas(FigureCanvasTkAgg):
+    """A Tk canvas of a figure that calls before_draw() right before every draw,
+    including the ones of draw_idle(), resizing and the toolbar"""
+    def __init__(self, figure, master, before_draw):
+        self.before_draw = before_draw
+        super().__init__(figure=figure, master=master)
+
+    def draw(self):
+        self.before_draw()
+        super().draw()
+
+
 class GraphFactory(tk.Frame, abc.ABC):
     """A Factory of various types of Tabs that has a Graph
-    with an attached side panel"""
+    with an attached side panel.
+
+    A graph keeps the artists of its last plot in artists. Plotting new data
+    updates them in place when it can, and the canvas is redrawn with draw_idle,
+    so Tk draws it once the pending events are handled. A graph that was rendered
+    before can be shown again from its pixels with show_rendered(). Its artists
+    are then left as they are, and only brought up to date right before the canvas
+    is really drawn again."""
 
     instances = {}
 
@@ -33,7 +54,11 @@ class GraphFactory(tk.Frame, abc.ABC):
     def __init__(self, master=None, cnf={}, **kwargs):
         super().__init__(master, cnf, **kwargs)
         self.__description = tk.StringVar()
+        self.__status = tk.StringVar()
         self.initialised = False
+        self.artists = None
+        self.__on_drawn = None
+        self.__stale = None
         self.init_components()
 
     @property
@@ -55,9 +80,12 @@ class GraphFactory(tk.Frame, abc.ABC):
         graph_frame = tk.Frame(self)
         label = tk.Label(graph_frame, textvariable=self.__description)
         label.pack(anchor=tk.W, side=tk.BOTTOM)
+        status = tk.Label(graph_frame, textvariable=self.__status, fg='gray')
+        status.pack(anchor=tk.E, side=tk.BOTTOM)
 
         self.fig, self.ax = plt.subplots(dpi=90)
-        self.canvas = FigureCanvasTkAgg(figure=self.fig, master=graph_frame)
+        self.canvas = GraphCanvas(self.fig, graph_frame, self.__update_stale_artists)
+        self.canvas.mpl_connect('draw_event', self.__drawn)
         NavigationToolbar2Tk(self.canvas, graph_frame)
         self.canvas.get_tk_widget().pack(expand=True, fill='both')
         graph_frame.pack(expand=True, fill='both')
@@ -68,14 +96,75 @@ class GraphFactory(tk.Frame, abc.ABC):
         raise NotImplementedError('Abstract Method')
 
     @abc.abstractmethod
-    def plot_graph(self, data, title):
-        """An abstract method to plot the graphs"""
+    def update_artists(self, data, title):
+        """An abstract method to put the data in the graph, without drawing it"""
         raise NotImplementedError('Abstract Method')
 
+    def plot_graph(self, data, title):
+        """Plots the graph. A capture of the pixels of an older plot is dropped."""
+        self.__on_drawn = None
+        self.__stale = None
+        self.update_artists(data, title)
+        self.canvas.draw_idle()
+
+    def show_rendered(self, image, data, title):
+        """Shows the RGBA pixels of a graph rendered before from the same data,
+        without touching matplotlib. The artists are only updated to that data right
+        before the next real draw, such as zooming with the toolbar. A capture of
+        the pixels of an older plot is dropped, since that plot is not shown anymore."""
+        self.__on_drawn = None
+        pixels = np.asarray(self.canvas.buffer_rgba())
+        if pixels.shape != image.shape:
+            self.__stale = None
+            self.update_artists(data, title)
+            self.canvas.draw_idle()
+            return
+        self.__stale = (data, title)
+        np.copyto(pixels, image)
+        self.canvas.blit()
+
+    def __update_stale_artists(self):
+        """Puts the data of the graph shown from its pixels into the artists.
+        Called right before the canvas is drawn."""
+        if self.__stale is not None:
+            (data, title), self.__stale = self.__stale, None
+            self.update_artists(data, title)
+
+    @property
+    def canvas_size(self) -> tuple:
+        """Returns the width and height of the canvas in pixels"""
+        return self.canvas.get_width_height(physical=True)
+
+    def capture_next_draw(self, callback):
+        """Calls callback with a copy of the RGBA pixels of the next draw. It is dropped
+        if another plot is shown or the canvas is reset before that draw."""
+        self.__on_drawn = callback
+
+    def __drawn(self, event):
+        """Hands the pixels of a finished draw to the capture callback"""
+        if self.__on_drawn is not None:
+            callback, self.__on_drawn = self.__on_drawn, None
+            callback(np.array(self.canvas.buffer_rgba()))
+
+    def set_busy(self, busy: bool):
+        """Show that the data of the graph is being computed"""
+        self.__status.set('Loading...' if busy else '')
+        self.config(cursor='watch' if busy else '')
+
     def reset_canvas(self):
         """resets the canvas"""
+        self.__on_drawn = None
+        self.__stale = None
         self.ax.clear()
-        self.canvas.draw()
+        self.artists = None
+        self.canvas.draw_idle()
+
+    def set_bar_heights(self, heights):
+        """Changes the heights of the bars of the last plot and rescales the y axis"""
+        for bar, height in zip(self.artists, heights):
+            bar.set_height(height)
+        self.ax.relim()
+        self.ax.autoscale_view(scalex=False)
 
 
 class CorrGraph(GraphFactory):
@@ -88,16 +177,25 @@ class CorrGraph(GraphFactory):
         self.side_panel.create_selector('Destination (Optional)')
         self.side_panel.create_button('PLOT')
 
-    def plot_graph(self, data, title):
-        """Plots the correlation graph and set correlation coefficient"""
-        self.ax.clear()
-        sns.scatterplot(x="average_delay_mins",
-                        y="previous_year_month_average_delay",
-                        data=data, ax=self.ax)
-        self.ax.set_xlabel("Average Delay in January 2024 (minutes)")
-        self.ax.set_ylabel("Average Delay in January 2023 (minutes)")
+    def update_artists(self, data, title):
+        """Plots the correlation graph and set correlation coefficient.
+        Once plotted, only the points are moved and the axes rescaled."""
+        if self.artists is None:
+            self.ax.clear()
+            sns.scatterplot(x="average_delay_mins",
+                            y="previous_year_month_average_delay",
+                            data=data, ax=self.ax)
+            self.ax.set_xlabel("Average Delay in January 2024 (minutes)")
+            self.ax.set_ylabel("Average Delay in January 2023 (minutes)")
+            self.artists = self.ax.collections[0]
+        else:
+            points = data[["average_delay_mins",
+                           "previous_year_month_average_delay"]].to_numpy(dtype=np.float64)
+            self.artists.set_offsets(points)
+            self.ax.ignore_existing_data_limits = True
+            self.ax.update_datalim(points[np.isfinite(points).all(axis=1)])
+            self.ax.autoscale_view()
         self.ax.set_title(title)
-        self.canvas.draw()
 
 
 class PieGraph(GraphFactory):
@@ -110,15 +208,29 @@ class PieGraph(GraphFactory):
         self.side_panel.create_selector('Airline')
         self.side_panel.create_button('PLOT')
 
-    def plot_graph(self, data, title):
-        """Plots the pie graph"""
-        self.ax.clear()
-        self.ax.pie(data, startangle=90, counterclock=False, autopct='%1.1f%%',
-                    pctdistance=1.15, labeldistance=1.25, radius=0.9)
-        self.ax.set_title(title)
-        self.ax.legend(['Flights not Cancelled', 'Flights Cancelled'])
+    def update_artists(self, data, title):
+        """Plots the pie graph. Once plotted, only the angles of the wedges
+        and the percentages are changed."""
+        total = np.sum(data)
+        if self.artists is None or total <= 0:
+            self.ax.clear()
+            wedges, _, autotexts = self.ax.pie(data, startangle=90, counterclock=False,
+                                               autopct='%1.1f%%', pctdistance=1.15,
+                                               labeldistance=1.25, radius=0.9)
+            self.ax.legend(['Flights not Cancelled', 'Flights Cancelled'])
+            self.artists = list(zip(wedges, autotexts))
+        else:
+            # The same layout as ax.pie: clockwise from the top
+            theta1 = 90
+            for (wedge, text), value in zip(self.artists, data):
+                theta2 = theta1 - 360 * value / total
+                wedge.set_theta1(theta2)
+                wedge.set_theta2(theta1)
+                middle = np.deg2rad((theta1 + theta2) / 2)
+                text.set_position((1.15 * 0.9 * np.cos(middle), 1.15 * 0.9 * np.sin(middle)))
+                text.set_text(f'{100 * value / total:.1f}%')
+                theta1 = theta2
         self.ax.set_title(title)
-        self.canvas.draw()
 
 
 class DistributionGraph(GraphFactory):
@@ -131,10 +243,16 @@ class DistributionGraph(GraphFactory):
         self.side_panel.create_selector('Airline')
         self.side_panel.create_button('PLOT')
 
-    def plot_graph(self, data, title):
-        """Plots the distribution graph"""
+    def update_artists(self, data, title):
+        """Plots the distribution graph. The intervals never change,
+        so once plotted only the heights of the bars are changed."""
+        if self.artists is not None:
+            self.set_bar_heights(data['Percent'])
+            self.ax.set_title(title)
+            return
         self.ax.clear()
         sns.barplot(x=data['Interval'], y=data['Percent'], ax=self.ax)
+        self.artists = self.ax.containers[0]
         interval_label = [
             '< -15',
             '[-15,1]',
@@ -150,7 +268,6 @@ class DistributionGraph(GraphFactory):
         self.ax.set_xticklabels(interval_label)
         self.ax.set_xlabel('Delay Interval (minutes)')
         self.ax.set_title(title)
-        self.canvas.draw()
 
 
 class BarGraph(GraphFactory):
@@ -168,16 +285,22 @@ class BarGraph(GraphFactory):
         self.side_panel.set_button_state('REMOVE', 'disabled')
         self.side_panel.set_button_state('ADD', 'disabled')
 
-    def plot_graph(self, data, title):
-        self.ax.clear()
-        sns.barplot(x=data[0], y=data[1], ax=self.ax)
-        self.ax.set_title(title)
-        self.ax.set_xlabel('Airlines')
-        if 'average_delay_mins' in title:
-            self.ax.set_ylabel('Average Delay (minutes)')
+    def update_artists(self, data, title):
+        """Plots the bar graph. If the number of airlines is the same as in the
+        last plot, only the heights of the bars and the airline names are changed."""
+        if self.artists is not None and len(self.artists) == len(data[0]):
+            self.set_bar_heights(data[1])
+            self.ax.set_xticks(range(len(data[0])), labels=list(data[0]))
         else:
-            self.ax.set_ylabel('Percentage')
-        self.canvas.draw()
+            self.ax.clear()
+            sns.barplot(x=data[0], y=data[1], ax=self.ax)
+            self.artists = self.ax.containers[0]
+            self.ax.set_xlabel('Airlines')
+            if 'average_delay_mins' in title:
+                self.ax.set_ylabel('Average Delay (minutes)')
+            else:
+                self.ax.set_ylabel('Percentage')
+        self.ax.set_title(title)
 
 
 class Storytelling(tk.Frame):
@@ -215,7 +338,8 @@ class Storytelling(tk.Frame):
 
     def __create_desc_stat_labels(self, data):
         """A method to fill descriptive statistics in the side panel"""
-        for i in data.split('\n'):
+        stats, title = data
+        for i in [title] + format_stats(stats):
             label = tk.Label(self.label_frame, text=i)
             label.pack(anchor='w', padx=10, pady=5)
 
@@ -0,0 +1,86 @@
+"""Loads the dataset through a columnar cache saved next to it"""
+import json
+import os
+import numpy as np
+import pandas as pd
+from digest import file_digest
+
+DATE_COLUMNS = {'run_date': '%d/%m/%Y %H:%M'}
+
+
+class DatasetLoader:
+    """Loads a punctuality statistics CSV file.
+
+    The first time a file is loaded, it is parsed and every column is saved as its own
+    .npy file in a directory next to it, with compact dtypes: text columns become
+    categories, counts become int32 and dates are parsed. Later loads memory-map
+    those files instead of parsing the CSV again. The cache keeps the hash of the
+    CSV file and is rebuilt when the file changes. The hash is computed once, and
+    can be handed to the other caches of the dataset as digest.
+    """
+    def __init__(self, source: str, digest: str = None) -> None:
+        self.source = source
+        self.digest = digest or file_digest(source)
+        self.path = os.path.splitext(source)[0] + '.columns'
+
+    def load(self) -> pd.DataFrame:
+        """Returns the dataset, from the cache if it is up to date"""
+        df = self.load_cache(self.digest)
+        if df is None:
+            df = self.compact(pd.read_csv(self.source))
+            self.save_cache(df, self.digest)
+        return df
+
+    @staticmethod
+    def compact(df: pd.DataFrame) -> pd.DataFrame:
+        """Converts the columns of a freshly parsed CSV file to compact dtypes"""
+        columns = {}
+        for name, column in df.items():
+            if name in DATE_COLUMNS:
+                columns[name] = pd.to_datetime(column, format=DATE_COLUMNS[name])
+            elif pd.api.types.is_integer_dtype(column) and \
+                    column.between(np.iinfo(np.int32).min, np.iinfo(np.int32).max).all():
+                columns[name] = column.astype(np.int32)
+            elif pd.api.types.is_numeric_dtype(column):
+                columns[name] = column.astype(np.float64)
+            else:
+                columns[name] = column.astype('category')
+        return pd.DataFrame(columns)
+
+    def load_cache(self, digest: str):
+        """Memory-maps the cached columns. Returns None if there is no cache
+        or it was built from a different file."""
+        try:
+            with open(os.path.join(self.path, 'meta.json'), encoding='utf-8') as file:
+                meta = json.load(file)
+            if meta['digest'] != digest:
+                return None
+            columns = {}
+            for i, name in enumerate(meta['columns']):
+                path = os.path.join(self.path, str(i))
+                if name in meta['categories']:
+                    codes = np.load(path + '.codes.npy', mmap_mode='r')
+                    categories = np.load(path + '.categories.npy')
+                    columns[name] = pd.Categorical.from_codes(codes, categories.astype(object))
+                else:
+                    columns[name] = np.load(path + '.npy', mmap_mode='r')
+            return pd.DataFrame(columns, copy=False)
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save_cache(self, df: pd.DataFrame, digest: str) -> None:
+        """Saves every column of the dataset in its own .npy file. The hash is
+        written last, so a half written cache is never loaded."""
+        os.makedirs(self.path, exist_ok=True)
+        categories = []
+        for i, (name, column) in enumerate(df.items()):
+            path = os.path.join(self.path, str(i))
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                categories.append(name)
+                np.save(path + '.codes.npy', column.cat.codes.to_numpy())
+                np.save(path + '.categories.npy', column.cat.categories.to_numpy(dtype=str))
+            else:
+                np.save(path + '.npy', column.to_numpy())
+        with open(os.path.join(self.path, 'meta.json'), 'w', encoding='utf-8') as file:
+            json.dump({'digest': digest, 'columns': list(df.columns),
+                       'categories': categories}, file)
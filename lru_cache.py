@@ -0,0 +1,84 @@
+"""A bounded least recently used cache"""
+from collections import OrderedDict
+from threading import Lock
+
+MISSING = object()
+
+
+class LRUCache:
+    """Keeps the results of up to maxsize keys. When it is full, the key that was
+    used the longest time ago is dropped. It counts its hits and misses.
+    It can be used from many threads; results are computed outside the lock.
+
+    If sizeof is given, it returns the size in bytes of a result and the results
+    are also bounded by maxbytes. A result larger than maxbytes is not kept.
+    maxsize can be None to only bound the bytes."""
+    def __init__(self, maxsize: int = 128, sizeof=None, maxbytes: int = None) -> None:
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self.__data = OrderedDict()
+        self.__lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def __contains__(self, key) -> bool:
+        return key in self.__data
+
+    def lookup(self, key, default=None):
+        """Returns the result of key, default if it is not cached"""
+        with self.__lock:
+            if key in self.__data:
+                self.hits += 1
+                self.__data.move_to_end(key)
+                return self.__data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value) -> None:
+        """Keeps the result of key, dropping the results used the longest time ago
+        until the cache is within its bounds"""
+        size = self.sizeof(value) if self.sizeof else 0
+        with self.__lock:
+            if key in self.__data:
+                self.__drop(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self.__data[key] = value
+            self.nbytes += size
+            while ((self.maxsize is not None and len(self.__data) > self.maxsize)
+                   or (self.maxbytes is not None and self.nbytes > self.maxbytes)):
+                self.__drop(next(iter(self.__data)))
+
+    def get(self, key, compute):
+        """Returns the result of key, calling compute() to get it if it is not cached.
+        Nothing is cached if compute() raises an exception."""
+        value = self.lookup(key, MISSING)
+        if value is MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Drops all results. The counters are kept."""
+        with self.__lock:
+            self.__data.clear()
+            self.nbytes = 0
+
+    def __drop(self, key) -> None:
+        value = self.__data.pop(key)
+        if self.sizeof:
+            self.nbytes -= self.sizeof(value)
+
+    @property
+    def stats(self) -> dict:
+        """Returns the hits, misses, hit rate, size and memory use of the cache"""
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self), 'maxsize': self.maxsize,
+                'nbytes': self.nbytes, 'maxbytes': self.maxbytes}
@@ -1,11 +1,14 @@
 import os
-import pandas as pd
 from controller import Controller
+from loader import DatasetLoader
 from model import Model
 from view import TabManager
-df = pd.read_csv(os.path.join(os.getcwd(),
-                                'dataset/202401_Punctuality_Statistics_Full_Analysis.csv'))
-m = Model(df)
-v = TabManager()
-c = Controller(v,m)
-c.run()
+
+if __name__ == '__main__':
+    source = os.path.join(os.getcwd(), 'dataset/202401_Punctuality_Statistics_Full_Analysis.csv')
+    loader = DatasetLoader(source)
+    df = loader.load()
+    m = Model(df, source=source, digest=loader.digest)
+    v = TabManager()
+    c = Controller(v,m)
+    c.run()
@@ -1,71 +1,309 @@
 """Contains models of the program"""
+from itertools import product
+import numpy as np
 import pandas as pd
 from numpy import number
+from lru_cache import LRUCache
+from outliers import OutlierFilter
+from storytelling import StorytellingCache, run_pipeline
 
+AIRPORT_COLUMNS = ['reporting_airport', 'origin_destination']
+CATEGORY_COLUMNS = ['airline_name', 'origin_destination_country'] + AIRPORT_COLUMNS
+ROUTE_COLUMNS = ['airline_name', 'reporting_airport', 'origin_destination']
+CUBE_COLUMNS = ROUTE_COLUMNS + ['origin_destination_country']
+FLIGHT_COLUMNS = ['number_flights_matched', 'number_flights_cancelled']
+AVERAGE_COLUMNS = ['average_delay_mins', 'flights_cancelled_percent']
+DESC_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+DESC_STAT_GROUPS = [('airline_name',), ('reporting_airport',),
+                    ('reporting_airport', 'origin_destination')]
 
-class Model:
-    """The model class"""
+
+def unique_rows(codes, sizes, return_inverse=False):
+    """np.unique(codes, axis=0) for non-negative integer codes below sizes, done on
+    one int64 key per row, which is much faster than comparing whole rows"""
+    keys = np.zeros(len(codes), dtype=np.int64)
+    for column, size in zip(codes.T, sizes):
+        keys = keys * size + column
+    keys, inverse = np.unique(keys, return_inverse=True)
+    rows = np.empty((len(keys), len(sizes)), dtype=np.int64)
+    for i in range(len(sizes) - 1, -1, -1):
+        keys, rows[:, i] = np.divmod(keys, sizes[i])
+    return (rows, inverse.ravel()) if return_inverse else rows
+
+
+class FacetIndex:
+    """The sorted choices of every selector, for every combination of the other
+    selectors. facets[column][(airline, origin, destination)] is the sorted list of
+    the values of column in the rows that match the key, where '' matches anything.
+    It is built once from the distinct routes, so a selector refresh is only a lookup.
+    """
+    def __init__(self, dataframe: pd.DataFrame) -> None:
+        names = [dataframe[column].cat.categories.to_numpy(dtype=object)
+                 for column in ROUTE_COLUMNS]
+        sizes = [len(name) for name in names]
+        routes = unique_rows(np.column_stack([dataframe[column].cat.codes.to_numpy()
+                                              for column in ROUTE_COLUMNS]), sizes)
+        self.facets = {}
+        for target, column in enumerate(ROUTE_COLUMNS):
+            facet = {}
+            for used in product([False, True], repeat=len(ROUTE_COLUMNS)):
+                keys = [i for i, use in enumerate(used) if use]
+                # Sorted by the key, then by the code of the value. Categories are
+                # sorted, so the values of each key come out sorted by name.
+                pairs = unique_rows(routes[:, keys + [target]],
+                                    [sizes[i] for i in keys + [target]])
+                starts = np.flatnonzero(np.any(pairs[1:, :-1] != pairs[:-1, :-1], axis=1)) + 1
+                for group in np.split(pairs, starts):
+                    key = iter(group[0, :-1].tolist())
+                    facet[tuple(names[i][next(key)] if use else ''
+                                for i, use in enumerate(used))] = \
+                        names[target][group[:, -1]].tolist()
+            self.facets[column] = facet
+
+    def get(self, column: str, airline: str = '', origin: str = '', destination: str = ''):
+        """Returns the sorted values of column in the rows of a route,
+        any part of which may be left out"""
+        return list(self.facets[column].get((airline or '', origin or '', destination or ''),
+                                            []))
+
+
+class AggregateCube:
+    """Additive measures of every (airline, origin, destination, country) cell.
+
+    Each cell keeps the number of rows, the sums of FLIGHT_COLUMNS, and for each of
+    AVERAGE_COLUMNS the number of values, their sum and their sum weighted by the
+    number of flights. Any slice or rollup is a sum over the cells, so the plain
+    and flight-weighted averages of a slice come from the same sums.
+    """
     def __init__(self, dataframe: pd.DataFrame) -> None:
-        self.__df = dataframe[dataframe['number_flights_matched'] > 0]
-        self.__df.reset_index(inplace=True)
+        flights = dataframe['number_flights_matched'].to_numpy(dtype=np.float64)
+        measures = {'rows': np.ones(len(dataframe))}
+        for column in FLIGHT_COLUMNS:
+            measures[column] = dataframe[column].to_numpy(dtype=np.float64)
+        for column in AVERAGE_COLUMNS:
+            values = dataframe[column].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(values)
+            measures[f'{column}_count'] = valid.astype(np.float64)
+            measures[f'{column}_sum'] = np.where(valid, values, 0)
+            measures[f'{column}_flights'] = np.where(valid, flights, 0)
+            measures[f'{column}_weighted_sum'] = np.where(valid, values * flights, 0)
+        codes = np.column_stack([dataframe[column].cat.codes.to_numpy()
+                                 for column in CUBE_COLUMNS])
+        cells, cell_of_row = unique_rows(codes, [len(dataframe[column].cat.categories)
+                                                 for column in CUBE_COLUMNS], True)
+        self.categories = {column: dataframe[column].dtype for column in CUBE_COLUMNS}
+        self.codes = {column: cells[:, i] for i, column in enumerate(CUBE_COLUMNS)}
+        self.lookup = {column: {name: code for code, name in
+                                enumerate(dtype.categories)}
+                       for column, dtype in self.categories.items()}
+        self.measures = {name: np.bincount(cell_of_row, values, len(cells))
+                         for name, values in measures.items()}
+
+    def __len__(self) -> int:
+        """Returns the number of cells"""
+        return len(self.codes[CUBE_COLUMNS[0]])
+
+    def mask(self, filters: dict = None):
+        """Returns a boolean mask of the cells that match filters, which maps a column
+        to a name or a list of names. Empty filters match every cell."""
+        mask = np.ones(len(self), dtype=bool)
+        for column, values in (filters or {}).items():
+            if not values:
+                continue
+            if isinstance(values, str):
+                values = [values]
+            codes = [self.lookup[column][value] for value in values
+                     if value in self.lookup[column]]
+            mask &= np.isin(self.codes[column], codes)
+        return mask
+
+    def total(self, measures: list, filters: dict = None) -> pd.Series:
+        """Returns the sums of the measures over the cells that match filters"""
+        mask = self.mask(filters)
+        return pd.Series({name: self.measures[name][mask].sum() for name in measures})
+
+    def rollup(self, column: str, measures: list, filters: dict = None) -> pd.DataFrame:
+        """Returns the sums of the measures for each value of column over the cells
+        that match filters, in the order of the categories. Values without any
+        matching cells are left out."""
+        mask = self.mask(filters)
+        codes = self.codes[column][mask]
+        size = len(self.categories[column].categories)
+        sums = {name: np.bincount(codes, self.measures[name][mask], size)
+                for name in measures + ['rows']}
+        present = np.flatnonzero(sums['rows'])
+        # A plain index, so plots don't make room for the categories left out
+        index = pd.Index(self.categories[column].categories[present], name=column)
+        return pd.DataFrame({name: sums[name][present] for name in measures}, index=index)
+
+    def mean(self, column: str, by: str, filters: dict = None) -> pd.Series:
+        """Returns the average of column for each value of by, every row counting once"""
+        sums = self.rollup(by, [f'{column}_sum', f'{column}_count'], filters)
+        return (sums[f'{column}_sum'] / sums[f'{column}_count']).rename(column)
+
+    def weighted_mean(self, column: str, by: str, filters: dict = None) -> pd.Series:
+        """Returns the average of column for each value of by, weighted by the number
+        of flights of each row"""
+        sums = self.rollup(by, [f'{column}_weighted_sum', f'{column}_flights'], filters)
+        return (sums[f'{column}_weighted_sum'] / sums[f'{column}_flights']).rename(column)
+
+
+class Model:
+    """The model class. Airline, airport and country names are kept as categories,
+    and both airport columns share one dictionary of airports, so filters compare
+    integer codes instead of strings.
+
+    The rows of every (airline, origin, destination) combination, with any of the
+    three left out, are looked up once in an index, so queries only take the rows
+    they need instead of copying and filtering the whole dataframe.
+
+    The results of get_graph_data() and data_storytelling() are kept in an LRU
+    cache. Its keys include the version of the dataset, which goes up every time
+    a dataset is loaded, so old results are never returned for a new dataset.
+    If the source file of the dataset is given, the storytelling dashboard is also
+    saved next to it, keyed by digest, the hash of the file (see DatasetLoader)."""
+    def __init__(self, dataframe: pd.DataFrame, cache_size: int = 128,
+                 source: str = None, digest: str = None) -> None:
+        self.version = 0
+        self.__cache = LRUCache(cache_size)
+        self.load(dataframe, source, digest)
+
+    def load(self, dataframe: pd.DataFrame, source: str = None, digest: str = None) -> None:
+        """Loads a new dataset and drops the cached results of the previous one"""
+        self.__storytelling = StorytellingCache(source, digest) if source else None
+        self.__df = dataframe[dataframe['number_flights_matched'] > 0].reset_index()
+        airports = pd.Index(pd.concat([self.__df[column].astype(str)
+                                       for column in AIRPORT_COLUMNS]).unique()).sort_values()
+        for column in CATEGORY_COLUMNS:
+            names = self.__df[column].astype(str)
+            if column in AIRPORT_COLUMNS:
+                categories = airports
+            else:
+                categories = pd.Index(names.unique()).sort_values()
+            self.__df[column] = names.astype(pd.CategoricalDtype(categories))
+        self.__routes = self.__build_route_index()
+        self.__facets = FacetIndex(self.__df)
+        self.__cube = AggregateCube(self.__df)
+        self.__desc_stats = self.__build_desc_stats('average_delay_mins')
+        self.version += 1
+        self.__cache.clear()
 
     @classmethod
-    def remove_outlier(cls, dataframe, column: list = None) -> pd.DataFrame:
+    def remove_outlier(cls, dataframe, column: list = None,
+                       strategy: str = 'percentile', by: str = None) -> pd.DataFrame:
         """A class method to remove outliers"""
-        temp_df = dataframe.copy()
+        return dataframe[cls.outlier_mask(dataframe, column, strategy, by)]
+
+    @classmethod
+    def outlier_mask(cls, dataframe, column: list = None,
+                     strategy: str = 'percentile', by: str = None):
+        """Returns a boolean array that is True for the rows without outliers.
+        See OutlierFilter for the strategies."""
         if not column:
             column = dataframe.select_dtypes(include=number).columns[3:]
-        for outlier_var in column:
-            p5 = temp_df[outlier_var].quantile(0.05)
-            p95 = temp_df[outlier_var].quantile(0.95)
-            temp_df = temp_df[~((temp_df[outlier_var] < p5) | (temp_df[outlier_var] > p95))]
-        return temp_df
+        return OutlierFilter(strategy, by).mask(dataframe, list(column))
 
     @property
     def df(self):
         """Returns the dataframe"""
         return self.__df
 
-    def __filter_origin_destination(self, temp_df: pd.DataFrame,
-                                    origin: str,
-                                    destination: str):
-        """Filters the origin and destination of a flight"""
+    @property
+    def cache_stats(self) -> dict:
+        """Returns the hits, misses, hit rate and size of the result cache"""
+        return self.__cache.stats
+
+    def __build_route_index(self) -> dict:
+        """Returns the row positions of every (airline, origin, destination) key.
+        A key has '' in place of the columns it does not filter."""
+        index = {('', '', ''): np.arange(len(self.__df))}
+        for used in product([False, True], repeat=len(ROUTE_COLUMNS)):
+            columns = [column for column, use in zip(ROUTE_COLUMNS, used) if use]
+            if not columns:
+                continue
+            groups = self.__df.groupby(columns, observed=True, sort=False).indices
+            for names, rows in groups.items():
+                names = iter(names if len(columns) > 1 else [names])
+                index[tuple(next(names) if use else '' for use in used)] = rows
+        return index
+
+    def __rows(self, airline: str = '', origin: str = '', destination: str = ''):
+        """Returns the row positions of a route, any part of which may be left out"""
+        return self.__routes.get((airline or '', origin or '', destination or ''),
+                                 np.empty(0, dtype=np.intp))
+
+    def __select(self, rows, columns: list) -> pd.DataFrame:
+        """Returns the columns of the rows at the given positions"""
+        return self.__df.iloc[rows, self.__df.columns.get_indexer(columns)]
+
+    @staticmethod
+    def describe(grouped) -> pd.DataFrame:
+        """Returns the same statistics as describe() of every group, computing each
+        statistic for all the groups at once"""
+        return pd.DataFrame({'count': grouped.count().astype(np.float64),
+                             'mean': grouped.mean(),
+                             'std': grouped.std(),
+                             'min': grouped.min(),
+                             '25%': grouped.quantile(0.25),
+                             '50%': grouped.median(),
+                             '75%': grouped.quantile(0.75),
+                             'max': grouped.max()})
+
+    def __build_desc_stats(self, column: str) -> dict:
+        """Returns the descriptive statistics of column for the whole dataset
+        and for every airline, airport and route"""
+        stats = {(): self.__df[column].describe()[DESC_STATS]}
+        for key in DESC_STAT_GROUPS:
+            grouped = self.__df.groupby(list(key), observed=True)[column]
+            stats[key] = self.describe(grouped)
+        return stats
+
+    def desc_stat_data(self, origin: str = '', airline: str = '', destination: str = ''):
+        """Returns the descriptive statistics of the average delay of the flights of an
+        airline from an origin to a destination, any of which may be left out.
+
+        Returns:
+            (stats, title) where stats maps each name in DESC_STATS to its value
+        """
+        title = 'Average delay of'
+        title += f' {airline}' if airline else (' flights' if origin or destination
+                                                else ' all Flights')
         if origin:
-            temp_df = temp_df[temp_df['reporting_airport'] == origin]
+            title += f' departed from {origin}'
         if destination:
-            temp_df = temp_df[temp_df['origin_destination'] == destination]
-        return temp_df
+            title += f' to {destination}'
+        title += ' (minutes)'
 
-    def desc_stat_data(self, origin: str = ''):
-        """Returns data for Descriptive Statistics"""
-        temp_df = self.df.copy()
-        if origin:
-            title = f'Average delay of flights departed from {origin} (minutes)\n'
-            temp_df = temp_df[temp_df['reporting_airport'] == origin]
+        route = {'airline_name': airline, 'reporting_airport': origin,
+                 'origin_destination': destination}
+        key = tuple(column for column, value in route.items() if value)
+        label = tuple(route[column] for column in key)
+        label = label[0] if len(label) == 1 else label
+        if key == ():
+            stats = self.__desc_stats[()]
+        elif key in self.__desc_stats and label in self.__desc_stats[key].index:
+            stats = self.__desc_stats[key].loc[label]
         else:
-            title = 'Average delay of all Flights (minutes)\n'
-        return title + str(temp_df['average_delay_mins'].describe())[:-41]
+            rows = self.__rows(airline, origin, destination)
+            stats = self.__select(rows, ['average_delay_mins'])['average_delay_mins'].describe()
+        return {name: float(stats[name]) for name in DESC_STATS}, title
 
     def corr_data(self,
                   airline: str = '',
                   origin: str = '',
                   destination: str = ''):
         """Returns data for Correlation Plot"""
-        temp_df = self.df.copy()
         title = 'Average delay of All Airlines'
         if airline:
-            temp_df = self.df[self.df['airline_name'] == airline]
             title = title[:13] + f' of {airline}'
             if origin:
                 title += f' from {origin}'
             if destination:
                 title += f' to {destination}'
 
-        temp_df = self.__filter_origin_destination(temp_df,
-                                                   origin,
-                                                   destination)
-        temp_df = temp_df.loc[:, ['average_delay_mins',
-                                  'previous_year_month_average_delay']]
+        temp_df = self.__select(self.__rows(airline, origin, destination),
+                                ['average_delay_mins',
+                                 'previous_year_month_average_delay'])
         corr = temp_df.corr()['average_delay_mins']['previous_year_month_average_delay']
         coefficient = f'\nCorrelation Coefficient = {corr:.4f}'
         return temp_df, title+coefficient
@@ -76,12 +314,10 @@ class Model:
         """Returns data for bar graph"""
         if not airlines:
             raise ValueError('Please select at least 1 airline')
-        temp_df = self.df[self.df['airline_name'].isin(airlines)]
-        temp_df = self.__filter_origin_destination(temp_df,
-                                                   origin,
-                                                   destination)
-        temp_df = temp_df.loc[:, ['airline_name', compare]]
-        temp_df = temp_df.groupby('airline_name').mean()
+        temp_df = self.__cube.mean(compare, 'airline_name',
+                                   {'airline_name': airlines,
+                                    'reporting_airport': origin,
+                                    'origin_destination': destination})
         temp_df = temp_df.reset_index()
         title = f'Comparing {compare}'
         return (temp_df.iloc[:, 0], temp_df.iloc[:, 1]), title
@@ -91,30 +327,23 @@ class Model:
                        origin: str = '',
                        destination: str = ''):
         """Returns data for pie chart"""
-        temp_df = self.df.copy()
         title = 'Flights cancellation rate'
         if airline:
-            temp_df = self.df[self.df['airline_name'] == airline]
             title += f' of {airline}'
         if origin:
             title += f' from {origin}'
         if destination:
             title += f' to {destination}'
-        temp_df = self.__filter_origin_destination(temp_df,
-                                                   origin,
-                                                   destination)
-        temp_df = temp_df.loc[:, ['number_flights_matched',
-                                  'number_flights_cancelled']]
-        return temp_df.sum(), title
+        flights = self.__cube.total(FLIGHT_COLUMNS,
+                                    {'airline_name': airline,
+                                     'reporting_airport': origin,
+                                     'origin_destination': destination})
+        return flights.astype(np.int64), title
 
     def distribution_data(self, airline: str, origin: str, destination: str):
         """Returns data for distribution graph (histogram)"""
         if not (airline and origin and destination):
             raise ValueError('Please fill in all fields')
-        temp_df = self.df[self.df['airline_name'] == airline]
-        temp_df = self.__filter_origin_destination(temp_df,
-                                                   origin,
-                                                   destination)
         filters = ['flights_more_than_15_minutes_early_percent',
                    'flights_15_minutes_early_to_1_minute_early_percent',
                    'flights_0_to_15_minutes_late_percent',
@@ -124,7 +353,7 @@ class Model:
                    'flights_between_121_and_180_minutes_late_percent',
                    'flights_between_181_and_360_minutes_late_percent',
                    'flights_more_than_360_minutes_late_percent']
-        temp_df = temp_df.loc[:, filters]
+        temp_df = self.__select(self.__rows(airline, origin, destination)[:1], filters)
         temp_df = temp_df.reset_index()
         temp_df = temp_df.loc[0]
         temp_df = temp_df.reset_index()
@@ -135,67 +364,102 @@ class Model:
         return temp_df, title
 
     def __busiest_flight_route(self):
-        """Returns the busiest flight routes"""
-        df2 = self.df.sort_values(by='number_flights_matched', ascending=False)
-        df2.reset_index(inplace=True)
-        return df2.loc[0, :]
+        """Returns the busiest flight route"""
+        return self.df.loc[self.df['number_flights_matched'].idxmax()]
 
-    def __busiest_airlines(self) -> str:
+    def __busiest_airlines(self) -> list:
         """returns top 3 airlines by number of flights"""
-        airlines = self.df.groupby('airline_name')['number_flights_matched'].sum()
-        airlines.sort_index(ascending=False, inplace=True)
-        return list(airlines.index[0:3])
-
-    def distribution_demo_data(self):
-        """Returns demo data for distribution graph"""
-        df2 = self.__busiest_flight_route()
-        airline = df2['airline_name']
-        origin = df2['reporting_airport']
-        destination = df2['origin_destination']
+        airlines = self.__cube.rollup('airline_name', ['number_flights_matched'])
+        airlines = airlines['number_flights_matched']
+        return list(airlines.nlargest(3).index)
+
+    def distribution_demo_data(self, route=None):
+        """Returns demo data for distribution graph. route is the busiest flight
+        route, found if it's not given."""
+        if route is None:
+            route = self.__busiest_flight_route()
+        airline = route['airline_name']
+        origin = route['reporting_airport']
+        destination = route['origin_destination']
         hist, hist_title = self.distribution_data(airline, origin, destination)
         return hist, hist_title, [origin, destination, airline]
 
-    def bar_graph_demo_data(self, compare: str):
-        """Returns demo data for bar graph"""
-        airlines = self.__busiest_airlines()
+    def bar_graph_demo_data(self, compare: str, airlines: list = None):
+        """Returns demo data for bar graph. airlines are the top 3 airlines by number
+        of flights, found if they're not given."""
+        if airlines is None:
+            airlines = self.__busiest_airlines()
         data, title = self.bar_graph_data(airlines=airlines, compare=compare)
         return data, title, airlines
 
     def data_storytelling(self):
         """Returns graphs for data storytelling tab"""
-        pie, pie_title = self.pie_chart_data()
-        corr, corr_title = self.corr_data()
-        box = Model.remove_outlier(self.df)['average_delay_mins']
+        return self.__cache.get(('Data Storytelling', self.version), self.__load_storytelling)
+
+    def __load_storytelling(self):
+        """Returns the saved storytelling graphs of the dataset, building and
+        saving them if there are none"""
+        if self.__storytelling is None:
+            return self.__data_storytelling()
+        payload = self.__storytelling.load()
+        if payload is None:
+            payload = self.__data_storytelling()
+            self.__storytelling.save(payload)
+        return payload
+
+    def __data_storytelling(self):
+        """Computes the graphs for data storytelling tab. The busiest airlines and
+        route are found once and shared, and the graphs that don't depend on each
+        other are computed at the same time."""
+        results = run_pipeline({
+            'airlines': (self.__busiest_airlines, []),
+            'route': (self.__busiest_flight_route, []),
+            'pie': (self.pie_chart_data, []),
+            'corr': (self.corr_data, []),
+            'box': (lambda: self.df['average_delay_mins'][Model.outlier_mask(self.df)], []),
+            'hist': (lambda route: self.distribution_demo_data(route)[0], ['route']),
+            'cancel': (lambda airlines: self.bar_graph_demo_data('flights_cancelled_percent',
+                                                                 airlines)[0], ['airlines']),
+            'delay': (lambda airlines: self.bar_graph_demo_data('average_delay_mins',
+                                                              airlines)[0], ['airlines']),
+            'desc': (self.desc_stat_data, []),
+        })
+        pie, pie_title = results['pie']
+        corr, corr_title = results['corr']
         box_title = 'Average Delays of all Flights'
-        hist = self.distribution_demo_data()[0]
         hist_title = 'Delay of the most\nFrequent Flight Route'
-        cancel = self.bar_graph_demo_data('flights_cancelled_percent')[0]
         cancel_title = 'Cancellation Rate of\ntop 3 airlines with most flights'
-        delay = self.bar_graph_demo_data('average_delay_mins')[0]
         delay_title = 'Delays of top 3 airlines\nwith most flights'
 
         return [[pie, pie_title],
                 [corr, corr_title],
-                [box, box_title],
-                [hist, hist_title],
-                [cancel, cancel_title],
-                [delay, delay_title]], self.desc_stat_data()
+                [results['box'], box_title],
+                [results['hist'], hist_title],
+                [results['cancel'], cancel_title],
+                [results['delay'], delay_title]], results['desc']
 
     def get_selector_data(self, name: str, filters: dict = None):
-        """Get the appropriate data for a selector object"""
+        """Get the appropriate data for a selector object, sorted"""
         translate = {'Airline': 'airline_name',
                      'Origin (Optional)': 'reporting_airport',
                      'Origin': 'reporting_airport',
                      'Destination (Optional)': 'origin_destination',
                      'Destination': 'origin_destination'}
 
-        temp_df = self.df.copy()
+        route = dict.fromkeys(ROUTE_COLUMNS, '')
         if filters:
             for key, val in filters.items():
-                column = translate[key]
                 if val:
-                    temp_df = temp_df[temp_df[column] == val]
-        return list(temp_df[translate[name]].unique())
+                    if route[translate[key]] not in ('', val):
+                        return []
+                    route[translate[key]] = val
+        return self.__facets.get(translate[name], *route.values())
+
+    def get_selectors_data(self, queries: dict) -> dict:
+        """Get the data of many selectors in one call. queries maps the name of
+        each selector to its filters, the result maps it to its sorted data."""
+        return {name: self.get_selector_data(name, filters)
+                for name, filters in queries.items()}
 
     def get_graph_data(self, name, options):
         """Get the data depending on the graph's type"""
@@ -212,7 +476,11 @@ class Model:
                 origin = val
             elif 'destination' in key.lower():
                 destination = val
-        if 'compare' in options:
-            compare = options['compare']
-            return self.bar_graph_data(airline, compare, origin, destination)
-        return translate[name](airline, origin, destination)
+        compare = options.get('compare')
+        # The order of the airlines doesn't change the bar graph
+        airlines = tuple(sorted(set(airline))) if isinstance(airline, list) else airline or ''
+        key = (name, airlines, origin or '', destination or '', compare, self.version)
+        if compare is not None:
+            return self.__cache.get(key, lambda: self.bar_graph_data(airline, compare,
+                                                                     origin, destination))
+        return self.__cache.get(key, lambda: translate[name](airline, origin, destination))
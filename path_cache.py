@@ -0,0 +1,108 @@
+"""Precomputed shortest path trees of the Pathfinder, saved next to the dataset"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from digest import file_digest
+
+_worker_pathfinder = None
+
+
+def init_worker(pathfinder):
+    """Keeps one copy of the Pathfinder in each worker process. It is the
+    initializer of every process pool that runs Pathfinder searches."""
+    global _worker_pathfinder
+    _worker_pathfinder = pathfinder
+
+
+def worker_pathfinder():
+    """Returns the Pathfinder of this worker process"""
+    return _worker_pathfinder
+
+
+def _build_trees(delay_or_cancel, origins):
+    """Runs Dijkstra's Algorithm from every origin in a worker process"""
+    return ShortestPathCache.build_trees(worker_pathfinder(), delay_or_cancel, origins)
+
+
+class ShortestPathCache:
+    """Shortest path trees from every origin airport for both the cancellation rate
+    and average delay graphs of a Pathfinder. Once the trees are built, finding a
+    route is only a walk up the parent pointers.
+
+    The trees are saved in a .npz file next to the dataset together with the hash
+    of the dataset. They are loaded the first time they are needed and rebuilt
+    only when the dataset has changed. If the hash is not given, it is computed
+    from the dataset.
+    """
+    def __init__(self, pathfinder, source: str, processes: int = None,
+                 digest: str = None) -> None:
+        self.pathfinder = pathfinder
+        self.source = source
+        self.digest = digest or file_digest(source)
+        self.path = os.path.splitext(source)[0] + '.paths.npz'
+        self.processes = processes
+        self.__trees = None
+
+    @property
+    def trees(self) -> dict:
+        """Returns the trees, loading or building them if needed"""
+        if self.__trees is None:
+            self.__trees = self.load(self.digest)
+            if self.__trees is None:
+                self.__trees = self.build()
+                self.save(self.digest)
+        return self.__trees
+
+    @staticmethod
+    def build_trees(pathfinder, delay_or_cancel, origins):
+        """Runs Dijkstra's Algorithm from each of the origins
+
+        Returns:
+            A list of (parent, parent_airline, dist) of each origin
+        """
+        adj = pathfinder.adj_delay if delay_or_cancel == 'delay' else pathfinder.adj_cancel
+        return [pathfinder.dijkstra(adj, origin, 0) for origin in origins]
+
+    def build(self) -> dict:
+        """Builds the trees of all origin airports across a process pool"""
+        # Both graphs have the same origin and destination pairs
+        origins = np.flatnonzero(np.diff(self.pathfinder.adj_cancel.offsets))
+        chunks = np.array_split(origins, max(1, min(len(origins), (os.cpu_count() or 1) * 4)))
+        trees = {'origins': origins}
+        with ProcessPoolExecutor(self.processes, initializer=init_worker,
+                                 initargs=(self.pathfinder,)) as executor:
+            for delay_or_cancel in ['cancel', 'delay']:
+                results = []
+                for chunk in executor.map(_build_trees,
+                                          [delay_or_cancel] * len(chunks), chunks):
+                    results.extend(chunk)
+                for i, name in enumerate(['parent', 'parent_airline', 'dist']):
+                    trees[f'{delay_or_cancel}_{name}'] = np.stack([tree[i] for tree in results])
+        return trees
+
+    def load(self, digest: str):
+        """Loads the trees from the disk. Returns None if there are no trees
+        or they were built from a different dataset."""
+        try:
+            with np.load(self.path) as file:
+                if str(file['digest']) != digest:
+                    return None
+                return {key: file[key] for key in file.files if key != 'digest'}
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, digest: str) -> None:
+        """Saves the trees next to the dataset"""
+        with open(self.path, 'wb') as file:
+            np.savez(file, digest=digest, **self.__trees)
+
+    def tree(self, delay_or_cancel: str, origin: int):
+        """Returns the (parent, parent_airline, dist) tree of an origin airport id.
+        Returns None if the airport has no outbound flights."""
+        trees = self.trees
+        i = np.searchsorted(trees['origins'], origin)
+        if i == len(trees['origins']) or trees['origins'][i] != origin:
+            return None
+        return (trees[f'{delay_or_cancel}_parent'][i],
+                trees[f'{delay_or_cancel}_parent_airline'][i],
+                trees[f'{delay_or_cancel}_dist'][i])
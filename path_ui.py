@@ -29,7 +29,15 @@ class PathUI(tk.Frame):
         """Initialise side panel"""
         self.side_panel.create_selector('Origin')
         self.side_panel.create_selector('Destination')
+        self.side_panel.create_selector('Max Stops (Optional)')
         self.side_panel.create_button('Find Route')
+        self.side_panel.create_scale('Reliability Weight (%)')
+        self.status = tk.Label(self.side_panel)
+        self.status.pack(pady=10)
+
+    def set_status(self, text):
+        """Show the state of the flight routes under the side panel"""
+        self.status['text'] = text
 
     def clear_subframes(self):
         """Clear the display"""
@@ -45,18 +53,39 @@ class PathUI(tk.Frame):
             lab.pack(anchor='w', pady=10, fill='both', expand=True)
         else:
             for flight in flights:
-                try:
-                    frm = tk.Frame(self.inner_frame)
-                    frm_img = tk.Frame(frm)
-                    self.__make_logo(frm_img, flight[0])
-                    frm_img.pack(side='left', anchor='w', padx=20)
-                except FileNotFoundError:
-                    pass
+                self.__make_flight(flight)
+
+    def create_frontier_subframes(self, routes):
+        """Create subframes for every route in the Pareto frontier. Each route
+        starts with a summary of its cancellation rate, delay and number of flights."""
+        self.clear_subframes()
+        if not routes:
+            lab = tk.Label(self.inner_frame, text='No Flights Exists')
+            lab.pack(anchor='w', pady=10, fill='both', expand=True)
+        for i, flights in enumerate(routes, 1):
+            cancel = sum(flight[3] for flight in flights)
+            delay = sum(flight[4] for flight in flights)
+            text = (f'Route {i}: {len(flights)} flight(s), '
+                    f'Cancellation Rate: {cancel:.2f} %, Average Delay: {delay:.2f} minutes')
+            lab = tk.Label(self.inner_frame, text=text, font=('Arial', 13, 'bold'))
+            lab.pack(anchor='w', pady=(20, 0))
+            for flight in flights:
+                self.__make_flight(flight)
+
+    def __make_flight(self, flight):
+        """Create a subframe of one flight"""
+        frm = tk.Frame(self.inner_frame)
+        try:
+            frm_img = tk.Frame(frm)
+            self.__make_logo(frm_img, flight[0])
+            frm_img.pack(side='left', anchor='w', padx=20)
+        except FileNotFoundError:
+            pass
 
-                frm_text = tk.Frame(frm)
-                self.__make_description(frm_text, flight)
-                frm_text.pack(side='right', fill='both', expand=True)
-                frm.pack(anchor='w', pady=10, fill='both', expand=True)
+        frm_text = tk.Frame(frm)
+        self.__make_description(frm_text, flight)
+        frm_text.pack(side='right', fill='both', expand=True)
+        frm.pack(anchor='w', pady=10, fill='both', expand=True)
 
     def __make_logo(self, frm, airline):
         """Read the logo and append it to the subframe"""
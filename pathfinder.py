@@ -1,99 +1,477 @@
 """An algorithms to find a path from one airport to another. Also a part of
 01219217 Data Structure and Algorithm I Course Project"""
 import heapq
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from route_graph import RouteGraph, ReachabilityIndex
+from path_cache import ShortestPathCache, init_worker, worker_pathfinder
+from contraction import ContractionHierarchy
+
+BATCH_COLUMNS = ['start', 'stop', 'leg', 'airline_name', 'reporting_airport',
+                 'origin_destination', 'flights_cancelled_percent', 'average_delay_mins']
+
+
+def _find_origin_paths(start, stops):
+    """Finds the routes from one origin in a worker process"""
+    return worker_pathfinder().find_origin_paths(start, stops)
 
 
 class Pathfinder:
     """Find a path from one airport to another based on flights cancellation
     and average delays. This is the same algorithm in
     01219217 Data Structure and Algorithm I Course Project with some
-    modifications to return the flight route instead of printing it."""
-    def __init__(self, df):
+    modifications to return the flight route instead of printing it.
+
+    If precompute is True, the shortest path trees from every origin airport are
+    built once and saved next to the source dataset (see ShortestPathCache), keyed
+    by digest, the hash of the dataset. Route queries then only walk the saved trees."""
+    def __init__(self, df, source: str = None, precompute: bool = False, digest: str = None):
         self.df = df
-        self.adj_cancel = self.read_csv_to_adj_list(0)
-        self.adj_delay = self.read_csv_to_adj_list(1)
+        self.adj_cancel, self.adj_delay, self.network = self.read_csv_to_graphs()
+        self.airports = self.adj_cancel.airports
+        self.airport_index = self.adj_cancel.airport_index
+        self.reachability = ReachabilityIndex(self.network)
+        self.hierarchy = None
+        self.search_stats = {'searches': 0, 'settled': 0, 'last_settled': 0}
+        self.path_cache = None
+        if precompute:
+            if not source:
+                raise ValueError('The source dataset is needed to precompute routes')
+            self.path_cache = ShortestPathCache(self, source, digest=digest)
 
-    def read_csv_to_adj_list(self, index):
-        """Reads the dataset and convert it into an adjoint list using python dictionary
-        Due to Python's limitations, I could not implement multiple edges from the same origin to
-        the same destination. Instead, the algorithm will decide what edge it should choose
+    def read_csv_to_graphs(self):
+        """Reads the dataset and convert it into graphs stored in CSR arrays
+        (see RouteGraph). Airports and airlines are interned to integer ids.
 
-        If there exists another edge that has less "index" (see below) than the current one,
-        replaces the current edge.
+        The network is a multigraph that keeps the edge of every airline flying from
+        an origin to a destination. The other two graphs, one weighted by cancellation
+        rate and one weighted by average delay, only keep one edge from the same origin
+        to the same destination. The algorithm will decide what edge it should choose
 
-        If there exists another edge that has the same "index" as the current one,
-        and the other "index" is less than the current one, replaces the current edge.
+        For every origin and destination, the edge with the least "index" (see below) is chosen.
+        If several edges have the same "index", the one with the least other "index" is chosen.
+        If they are still tied, the edge that appears first in the dataset is chosen.
+        The network chooses between rows of the same airline in the same way with
+        index = 0.
 
-        Args:
-            index (int): aka. "Weight". 0 = cancellation rate, 1 = average delay in minutes
+        All graphs are built from a single vectorised pass over the dataframe instead of
+        looking up each row one by one.
 
-        Returns:
-            The adjoint dict in the following format
-            {
-                'Origin1' : {'Destination1': [cancel_rate, average_delay_mins, airline_name],
-                            'Destination2': [cancel_rate, average_delay_mins, airline_name]}
+        "index" aka. "Weight". 0 = cancellation rate, 1 = average delay in minutes
 
-                'Origin2' : {} (In case that that airport has no outbound routes)
-            }
+        Returns:
+            A tuple of the (cancellation rate, average delay, network) RouteGraphs.
+            All graphs share the same airport and airline ids. Airports with no
+            outbound routes have no edges.
         """
-        adj = {}
-
-        for i in range(len(self.df)):
-            origin = self.df.loc[i, 'reporting_airport']
-            destination = self.df.loc[i, 'origin_destination']
-            cancel_rate = self.df.loc[i, 'flights_cancelled_percent']
-            average_delay_mins = self.df.loc[i, 'average_delay_mins']
-            airline_name = self.df.loc[i, 'airline_name']
-            thing = [cancel_rate, average_delay_mins, airline_name]
-
-            if origin not in adj:
-                adj[origin] = {destination: thing}
-
-            elif destination in adj[origin]:
-                if adj[origin][destination][index] > thing[index]:
-                    adj[origin][destination] = thing
-                elif adj[origin][destination][index] == thing[index]\
-                and adj[origin][destination][(index+1) % 2] > thing[(index+1) % 2]:
-                    adj[origin][destination] = thing
-            else:
-                adj[origin][destination] = thing
+        airports = pd.unique(np.concatenate([self.df['reporting_airport'].to_numpy(),
+                                             self.df['origin_destination'].to_numpy()]))
+        airport_ids = pd.Index(airports)
+        origins = airport_ids.get_indexer(self.df['reporting_airport'])
+        destinations = airport_ids.get_indexer(self.df['origin_destination'])
+        airlines = pd.Index(self.df['airline_name'].unique())
+        airline_ids = airlines.get_indexer(self.df['airline_name'])
+        weights = [self.df['flights_cancelled_percent'].to_numpy(dtype=np.float64),
+                   self.df['average_delay_mins'].to_numpy(dtype=np.float64)]
+        pairs = origins.astype(np.int64) * len(airports) + destinations
+
+        graphs = []
+        for index, keys in [(0, pairs), (1, pairs), (0, pairs * len(airlines) + airline_ids)]:
+            # np.lexsort is stable, so full ties keep the order of the dataset
+            order = np.lexsort((weights[(index+1) % 2], weights[index], keys))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = keys[order][1:] != keys[order][:-1]
+            best = order[first]
+            graphs.append(RouteGraph.from_edges(airports, airlines, origins[best],
+                                                destinations[best], weights[0][best],
+                                                weights[1][best], airline_ids[best]))
+        return tuple(graphs)
 
-        for i in range(len(self.df)):
-            if self.df.loc[i, 'origin_destination'] not in adj:
-                adj[self.df.loc[i, 'origin_destination']] = {}
-        return adj
+    def dijkstra(self, adj_list, s, index=0, target=None, airline_mask=None):
+        """Dijkstra's Algorithm on a RouteGraph. s is the id of the origin airport.
+        Airports are compared by the "index" weight first and the other weight second.
+        The heap is keyed by those distances, so every airport is settled once.
+        If target is given, the search stops as soon as the target airport is settled.
+        If airline_mask is given, only edges of the airlines it allows are used.
 
-    def dijkstra(self, adj_list, s, index=0):
-        """Dijkstra's Algorithm"""
-        dist = {node: [float('inf'), float('inf')] for node in adj_list}
-        dist[s] = [0, 0]
-        parent = {}
-        parent_airline = {}
-        bag = [(s, [0, 0])]
+        Returns:
+            parent (the previous airport id of each airport, -1 if unreachable),
+            parent_airline (the airline id used to reach each airport),
+            dist (2 x airports array of the cancellation rate and average delay)
+        """
+        other = (index+1) % 2
+        dist = np.full((2, len(adj_list)), np.inf)
+        dist[:, s] = 0
+        parent = np.full(len(adj_list), -1, dtype=np.int32)
+        parent_airline = np.full(len(adj_list), -1, dtype=np.int32)
+        settled = np.zeros(len(adj_list), dtype=bool)
+        bag = [(0.0, 0.0, s)]
+        count = 0
 
         while bag:
-            u, dist_u = heapq.heappop(bag)
-            if dist_u[index] > dist[u][index]:
+            dist_u, other_u, u = heapq.heappop(bag)
+            if settled[u]:
                 continue
-            for v, w in adj_list[u].items():
-                if dist_u[index] + w[index] < dist[v][index]:
-                    dist[v][index] = dist_u[index] + w[index]
-                    # Keep tracks of the other attribute
-                    dist[v][(index+1) % 2] = dist_u[(index+1) % 2] + w[(index+1) % 2]
-                    parent[v] = u
-                    parent_airline[v] = w[2]    # keep tracks of the airline
-                    thing = (v, [dist_u[index] + w[index],
-                                 dist_u[(index+1) % 2] + w[(index+1) % 2]])
-                    heapq.heappush(bag, thing)
+            settled[u] = True
+            count += 1
+            if u == target:
+                break
+            for item in self.__relax(adj_list, u, dist_u, other_u, index, dist[index],
+                                     dist[other], parent, parent_airline, airline_mask):
+                heapq.heappush(bag, item)
+        self.__count_settled(count)
         return parent, parent_airline, dist
 
+    def bidirectional_dijkstra(self, adj_list, s, t, index=0, airline_mask=None):
+        """Bidirectional Dijkstra's Algorithm for point-to-point queries. Searches
+        forward from s and backward from t at the same time and stops when the two
+        searches cannot find a shorter route than the best one found.
+
+        Returns:
+            Same as dijkstra(), but dist is only filled in for t and
+            parent and parent_airline only describe the route from s to t.
+        """
+        other = (index+1) % 2
+        graphs = [adj_list, adj_list.reverse()]
+        dists = [np.full((2, len(adj_list)), np.inf) for _ in graphs]
+        parents = [np.full(len(adj_list), -1, dtype=np.int32) for _ in graphs]
+        airlines = [np.full(len(adj_list), -1, dtype=np.int32) for _ in graphs]
+        settled = [np.zeros(len(adj_list), dtype=bool) for _ in graphs]
+        bags = [[(0.0, 0.0, s)], [(0.0, 0.0, t)]]
+        for dist, node in zip(dists, [s, t]):
+            dist[:, node] = 0
+        best = (np.inf, np.inf)
+        meet = -1
+        count = 0
+
+        while bags[0] and bags[1]:
+            top = [bag[0] for bag in bags]
+            if (top[0][0] + top[1][0], top[0][1] + top[1][1]) >= best:
+                break
+            side = 0 if top[0] <= top[1] else 1
+            dist_u, other_u, u = heapq.heappop(bags[side])
+            if settled[side][u]:
+                continue
+            settled[side][u] = True
+            count += 1
+            pushed = self.__relax(graphs[side], u, dist_u, other_u, index,
+                                  dists[side][index], dists[side][other],
+                                  parents[side], airlines[side], airline_mask)
+            for item in pushed:
+                heapq.heappush(bags[side], item)
+            # Check whether the searches met on any airport reached from u
+            for dist_v, other_v, v in pushed + [(dist_u, other_u, u)]:
+                route = (dist_v + dists[1-side][index, v], other_v + dists[1-side][other, v])
+                if route < best:
+                    best, meet = route, v
+        self.__count_settled(count)
+
+        dist = np.full((2, len(adj_list)), np.inf)
+        parent = np.full(len(adj_list), -1, dtype=np.int32)
+        parent_airline = np.full(len(adj_list), -1, dtype=np.int32)
+        if meet < 0:
+            return parent, parent_airline, dist
+        dist[index, t], dist[other, t] = best
+        u = meet
+        while u != s:
+            parent[u], parent_airline[u] = parents[0][u], airlines[0][u]
+            u = parent[u]
+        u = meet
+        while u != t:
+            v = parents[1][u]
+            parent[v], parent_airline[v] = u, airlines[1][u]
+            u = v
+        return parent, parent_airline, dist
+
+    def bounded_search(self, adj_list, s, t, max_legs, index=0, airline_mask=None):
+        """Layered Bellman-Ford search from airport id s to airport id t that uses
+        at most max_legs flights. Layer k relaxes, all at once, the edges of the
+        airports that improved in layer k-1, so the search stops expanding after
+        max_legs layers or when nothing improves.
+
+        Returns:
+            Same as bidirectional_dijkstra()
+        """
+        other = (index+1) % 2
+        n = len(adj_list)
+        sources, targets = adj_list.sources, adj_list.targets
+        weights = adj_list.weights
+        usable = np.ones(len(targets), dtype=bool)
+        if airline_mask is not None:
+            usable = airline_mask[adj_list.airline_ids]
+        dist = np.full((2, n), np.inf)
+        dist[:, s] = 0
+        # The layer that set the best distance of each airport, and the
+        # previous airport and airline of each layer
+        layer_of = np.zeros(n, dtype=np.int32)
+        layers = []
+        frontier = np.zeros(n, dtype=bool)
+        frontier[s] = True
+        count = 1
+
+        for layer in range(1, max_legs + 1):
+            edges = np.flatnonzero(frontier[sources] & usable)
+            if not len(edges):
+                break
+            u, v = sources[edges], targets[edges]
+            new_dist = dist[index, u] + weights[index][edges]
+            new_other = dist[other, u] + weights[other][edges]
+            # Keep the best edge into each airport
+            order = np.lexsort((new_other, new_dist, v))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = v[order][1:] != v[order][:-1]
+            best = order[first]
+            v, u = v[best], u[best]
+            new_dist, new_other = new_dist[best], new_other[best]
+            improved = (new_dist < dist[index, v]) | ((new_dist == dist[index, v])
+                                                      & (new_other < dist[other, v]))
+            v, u, best = v[improved], u[improved], best[improved]
+            # Remember the layer of u that the edge starts from before updating
+            layers.append((v, u, adj_list.airline_ids[edges[best]], layer_of[u]))
+            dist[index, v] = new_dist[improved]
+            dist[other, v] = new_other[improved]
+            layer_of[v] = layer
+            frontier[:] = False
+            frontier[v] = True
+            count += len(v)
+        self.__count_settled(count)
+
+        parent = np.full(n, -1, dtype=np.int32)
+        parent_airline = np.full(n, -1, dtype=np.int32)
+        result = np.full((2, n), np.inf)
+        if dist[index, t] == np.inf:
+            return parent, parent_airline, result
+        result[:, t] = dist[:, t]
+        v, layer = t, layer_of[t]
+        while layer > 0:
+            targets_k, sources_k, airlines_k, previous_k = layers[layer - 1]
+            i = np.searchsorted(targets_k, v)
+            parent[v], parent_airline[v] = sources_k[i], airlines_k[i]
+            v, layer = sources_k[i], previous_k[i]
+        return parent, parent_airline, result
+
+    def pareto_search(self, s, t, max_legs=None, airline_mask=None):
+        """Multi-criteria label-setting search from airport id s to airport id t.
+        A label is a route to an airport with its total cancellation rate, total
+        average delay and number of legs. Labels are settled in order of those
+        values, and a label is dropped if it is dominated (no better in all three)
+        by a settled label of the same airport or of the target.
+        If airline_mask is given, only edges of the airlines it allows are used.
+
+        Returns:
+            The Pareto frontier, a list of routes to t. Each route is a list of
+            edge ids of self.network.
+        """
+        graph = self.network
+        settled = [[] for _ in range(len(graph))]
+        labels = []
+        frontier = []
+        bag = [(0.0, 0.0, 0, s, -1, -1)]
+
+        while bag:
+            cancel, delay, legs, u, previous, edge = heapq.heappop(bag)
+            if self.__dominated((cancel, delay, legs), settled[u]):
+                continue
+            settled[u].append((cancel, delay, legs))
+            labels.append((previous, edge))
+            if u == t:
+                frontier.append(len(labels) - 1)
+                continue
+            if max_legs is not None and legs >= max_legs:
+                continue
+            lo, hi = graph.offsets[u], graph.offsets[u+1]
+            edges = np.arange(lo, hi)
+            if airline_mask is not None:
+                edges = edges[airline_mask[graph.airline_ids[lo:hi]]]
+            for e, v, edge_cancel, edge_delay in zip(edges.tolist(),
+                                                     graph.targets[edges].tolist(),
+                                                     graph.cancel[edges].tolist(),
+                                                     graph.delay[edges].tolist()):
+                label = (cancel + edge_cancel, delay + edge_delay, legs + 1)
+                if self.__dominated(label, settled[v]) or self.__dominated(label, settled[t]):
+                    continue
+                heapq.heappush(bag, label + (v, len(labels) - 1, e))
+        self.__count_settled(len(labels))
+
+        routes = []
+        for label in frontier:
+            route = []
+            while labels[label][0] >= 0:
+                route.append(labels[label][1])
+                label = labels[label][0]
+            route.reverse()
+            routes.append(route)
+        return routes
+
+    def k_shortest_paths(self, adj_list, s, t, k=5, index=0, max_settled=200000):
+        """Yen's Algorithm. Finds up to k loopless routes from airport id s to
+        airport id t, in order of the "index" weight and then the other weight.
+
+        The shortest path tree towards t is built once with a backward Dijkstra and
+        is used as an exact A* heuristic by every spur search, so each spur search
+        only settles the airports near the spur route. The searches stop when
+        max_settled airports have been settled in total.
+
+        Returns:
+            A list of routes, each route is a list of edge ids of adj_list. It is
+            empty if there is no route or the budget runs out before the first one
+        """
+        other = (index+1) % 2
+        tree = self.dijkstra(adj_list.reverse(), t, index)[2]
+        h = [tree[index].tolist(), tree[other].tolist()]
+        if h[0][s] == np.inf:
+            return []
+        budget = [max_settled]
+        found = [self.__spur_search(adj_list, s, t, h, index, set(), set(), budget)]
+        if found[0] is None:
+            return []
+        candidates = []
+        seen = {tuple(found[0][2])}
+
+        while len(found) < k:
+            nodes, edges = found[-1][1], found[-1][2]
+            for i in range(len(edges)):
+                if budget[0] <= 0:
+                    break
+                root_edges = edges[:i]
+                blocked_edges = {route[2][i] for route in found
+                                 if route[2][:i] == root_edges and len(route[2]) > i}
+                spur = self.__spur_search(adj_list, nodes[i], t, h, index,
+                                          set(nodes[:i]), blocked_edges, budget)
+                if spur is None:
+                    continue
+                route = root_edges + spur[2]
+                if tuple(route) in seen:
+                    continue
+                seen.add(tuple(route))
+                cost = (sum(adj_list.weights[index][route].tolist()),
+                        sum(adj_list.weights[other][route].tolist()))
+                heapq.heappush(candidates, (cost, nodes[:i] + spur[1], route))
+            if not candidates:
+                break
+            cost, nodes, route = heapq.heappop(candidates)
+            found.append((cost, nodes, route))
+        return [route[2] for route in found]
+
+    def __spur_search(self, adj_list, s, t, h, index, blocked_nodes, blocked_edges, budget):
+        """A* search from s to t that avoids some airports and edges. h is the
+        (index, other) distance from every airport to t in the full graph.
+
+        Returns:
+            (cost, airports, edges) of the route, None if there is no route
+        """
+        other = (index+1) % 2
+        if h[0][s] == np.inf or s in blocked_nodes:
+            return None
+        weights = adj_list.weights
+        dist = {s: (0.0, 0.0)}
+        parent = {s: (-1, -1)}
+        settled = set()
+        bag = [(h[0][s], h[1][s], 0.0, 0.0, s)]
+        while bag and budget[0] > 0:
+            _, _, dist_u, other_u, u = heapq.heappop(bag)
+            if u in settled:
+                continue
+            settled.add(u)
+            budget[0] -= 1
+            if u == t:
+                nodes, edges = [u], []
+                while parent[u][0] >= 0:
+                    u, edge = parent[u]
+                    nodes.append(u)
+                    edges.append(edge)
+                return (dist_u, other_u), nodes[::-1], edges[::-1]
+            lo, hi = adj_list.offsets[u], adj_list.offsets[u+1]
+            for e, v, w_index, w_other in zip(range(lo, hi), adj_list.targets[lo:hi].tolist(),
+                                              weights[index][lo:hi].tolist(),
+                                              weights[other][lo:hi].tolist()):
+                if v in blocked_nodes or e in blocked_edges or h[0][v] == np.inf:
+                    continue
+                new = (dist_u + w_index, other_u + w_other)
+                if v not in dist or new < dist[v]:
+                    dist[v] = new
+                    parent[v] = (u, e)
+                    heapq.heappush(bag, (new[0] + h[0][v], new[1] + h[1][v]) + new + (v,))
+        return None
+
+    @staticmethod
+    def __dominated(label, others):
+        """Returns True if any of the others is at least as good as label in every value"""
+        for other in others:
+            if other[0] <= label[0] and other[1] <= label[1] and other[2] <= label[2]:
+                return True
+        return False
+
+    def __relax(self, adj_list, u, dist_u, other_u, index, dist, dist_other,
+                parent, parent_airline, airline_mask=None):
+        """Relaxes all outbound edges of airport u. An edge improves an airport if it
+        makes the "index" weight smaller, or keeps it and makes the other weight smaller.
+        Edges of airlines that are not in airline_mask are skipped.
+
+        Returns:
+            A list of (dist, other dist, airport) of the improved airports
+        """
+        lo, hi = adj_list.offsets[u], adj_list.offsets[u+1]
+        if lo == hi:
+            return []
+        weights = adj_list.weights
+        v = adj_list.targets[lo:hi]
+        airline = adj_list.airline_ids[lo:hi]
+        new_dist = dist_u + weights[index][lo:hi]
+        # Keep tracks of the other attribute
+        new_other = other_u + weights[(index+1) % 2][lo:hi]
+        usable = np.ones(hi - lo, dtype=bool) if airline_mask is None else airline_mask[airline]
+        if adj_list.multigraph:
+            # Only the best usable edge of the parallel edges to the same airport may improve it
+            order = np.lexsort((new_other, new_dist, v))
+            order = order[usable[order]]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = v[order][1:] != v[order][:-1]
+            usable = np.zeros(hi - lo, dtype=bool)
+            usable[order[first]] = True
+        improved = usable & ((new_dist < dist[v])
+                             | ((new_dist == dist[v]) & (new_other < dist_other[v])))
+        v = v[improved]
+        new_dist = new_dist[improved]
+        new_other = new_other[improved]
+        dist[v] = new_dist
+        dist_other[v] = new_other
+        parent[v] = u
+        parent_airline[v] = airline[improved]    # keep tracks of the airline
+        return list(zip(new_dist.tolist(), new_other.tolist(), v.tolist()))
+
+    def __count_settled(self, count):
+        """Keeps track of how many airports the searches settled"""
+        self.search_stats['searches'] += 1
+        self.search_stats['settled'] += count
+        self.search_stats['last_settled'] = count
+
+    def search(self, delay_or_cancel, s, t, max_stops=None):
+        """Finds the route from airport id s to airport id t, from the precomputed
+        trees if there are any. If max_stops is given, the route changes flight at
+        most max_stops times. Returns the same as dijkstra()"""
+        adj = self.adj_delay if delay_or_cancel == 'delay' else self.adj_cancel
+        if max_stops is not None:
+            return self.bounded_search(adj, s, t, max_stops + 1)
+        if self.path_cache:
+            tree = self.path_cache.tree(delay_or_cancel, s)
+            if tree is None:
+                return (np.full(len(self.airports), -1), np.full(len(self.airports), -1),
+                        np.full((2, len(self.airports)), np.inf))
+            return tree
+        return self.bidirectional_dijkstra(adj, s, t, 0)
+
     def linear_search(self, adj_list, start, destination):
         """Linear Search Algorithm"""
         try:
-            direct_path = adj_list[start][destination]
-            return direct_path
+            i = adj_list.find_edge(self.airport_index[start], self.airport_index[destination])
         except KeyError:
             return None
+        if i < 0:
+            return None
+        return [float(adj_list.cancel[i]), float(adj_list.delay[i]),
+                adj_list.airlines[adj_list.airline_ids[i]]]
 
     def return_linear(self, start, stop, direct_path):
         """Return Linear Search Results"""
@@ -103,44 +481,167 @@ class Pathfinder:
 
     def return_dijkstra(self, start, stop, parent, parent_airline, delay_or_cancel):
         """Return Dijkstra's Algorithm search results"""
-        airline_stop = ''
+        if delay_or_cancel == 'delay':
+            adj = self.adj_delay
+        elif delay_or_cancel == 'cancel':
+            adj = self.adj_cancel
+        else:
+            adj = self.network
+        start = self.airport_index[start]
+        stop = self.airport_index[stop]
         stop_list = []
-        airline_list = []
         while stop != start:
             stop_list.append(stop)
-            try:
-                airline_stop = parent_airline[stop]
-            except KeyError:
+            if parent[stop] < 0:
                 return None, None, None
-            airline_list.append(airline_stop)
             stop = parent[stop]
         stop_list.reverse()
         airports = [start] + stop_list
-        airline_list.reverse()
 
         ret_list = []
 
         for i in range(1, len(airports)):
             origin = airports[i-1]
-            airline = airline_list[i-1]
             destination = airports[i]
-            if delay_or_cancel == 'delay':
-                adj = self.adj_delay[origin][destination]
-            elif delay_or_cancel == 'cancel':
-                adj = self.adj_cancel[origin][destination]
-            cancel = adj[0]
-            delay = adj[1]
-            temp_lst = [airline, origin, destination, cancel, delay]
+            edge = adj.find_edge(origin, destination, parent_airline[destination])
+            airline = adj.airlines[parent_airline[destination]]
+            cancel = float(adj.cancel[edge])
+            delay = float(adj.delay[edge])
+            temp_lst = [airline, self.airports[origin], self.airports[destination],
+                        cancel, delay]
             ret_list.append(temp_lst)
 
         return ret_list
 
-    def find_flight_path(self, start, stop):
-        """Find the flight path from city A to city B"""
+    def return_edges(self, edges, graph=None):
+        """Return a route of edge ids of graph (self.network by default)
+        in the same format as return_dijkstra()"""
+        if graph is None:
+            graph = self.network
+        sources = np.searchsorted(graph.offsets, edges, side='right') - 1
+        return [[graph.airlines[graph.airline_ids[edge]], self.airports[origin],
+                 self.airports[graph.targets[edge]], float(graph.cancel[edge]),
+                 float(graph.delay[edge])] for origin, edge in zip(sources, edges)]
+
+    def reachable_airports(self, start):
+        """Returns the names of all airports that can be reached from city A, sorted"""
+        reachable = self.reachability.reachable_from(self.airport_index[start])
+        reachable[self.airport_index[start]] = False
+        return sorted(self.airports[i] for i in np.flatnonzero(reachable))
+
+    def airline_masks(self, s, t, airlines=None, exclude=None, single_carrier=False):
+        """Returns the airline masks that a route query from airport id s to airport
+        id t has to search. If single_carrier is True, there is one mask for each
+        allowed airline that flies out of s and into t."""
+        mask = self.network.airline_mask(airlines, exclude)
+        if not single_carrier:
+            return [mask]
+        graph, reverse = self.network, self.network.reverse()
+        candidates = np.intersect1d(graph.airline_ids[graph.offsets[s]:graph.offsets[s+1]],
+                                    reverse.airline_ids[reverse.offsets[t]:reverse.offsets[t+1]])
+        masks = []
+        for airline in candidates[mask[candidates]]:
+            carrier = np.zeros(len(mask), dtype=bool)
+            carrier[airline] = True
+            masks.append(carrier)
+        return masks
+
+    def __validate(self, start, stop):
+        """Checks that both airports are selected and are not the same airport.
+
+        Returns:
+            The (origin, destination) airport ids
+        """
         if not start or not stop:
             raise ValueError('Please Select Both Origin and Destination')
         if start == stop:
             raise ValueError('The Origin airport cannot be the same as the destination')
+        return self.airport_index[start], self.airport_index[stop]
+
+    def find_pareto_paths(self, start, stop, max_legs=None, airlines=None,
+                          exclude=None, single_carrier=False):
+        """Find every flight path from city A to city B that is not worse than another
+        one in all of cancellation rate, average delay and number of flights.
+        The routes can be limited to some airlines, avoid some airlines, or be
+        flown by a single airline.
+        Returns the routes sorted by cancellation rate, an empty list if there are none."""
+        s, t = self.__validate(start, stop)
+        if not self.reachability.reachable(s, t):
+            return []
+        routes = []
+        for mask in self.airline_masks(s, t, airlines, exclude, single_carrier):
+            for route in self.pareto_search(s, t, max_legs, mask):
+                label = (sum(self.network.cancel[route].tolist()),
+                         sum(self.network.delay[route].tolist()), len(route))
+                routes.append((label, route))
+        routes.sort()
+        frontier = []
+        for label, route in routes:
+            if not self.__dominated(label, [other for other, _ in frontier]):
+                frontier.append((label, route))
+        return [self.return_edges(route) for _, route in frontier]
+
+    def find_carrier_path(self, start, stop, airlines=None, exclude=None,
+                          single_carrier=False, max_stops=None):
+        """Find the flight path from city A to city B with the least cancellation rate
+        that only uses some airlines, avoids some airlines, or is flown by a single
+        airline. Every airline's flights are searched, not only the best one of each route.
+        If max_stops is given, the route changes flight at most max_stops times."""
+        s, t = self.__validate(start, stop)
+        if not self.reachability.reachable(s, t):
+            return None, None, None
+        best = None
+        for mask in self.airline_masks(s, t, airlines, exclude, single_carrier):
+            if max_stops is None:
+                parent, parent_airline, dist = self.dijkstra(self.network, s, 0, t, mask)
+            else:
+                parent, parent_airline, dist = self.bounded_search(self.network, s, t,
+                                                                   max_stops + 1, 0, mask)
+            if best is None or (dist[0, t], dist[1, t]) < (best[2][0, t], best[2][1, t]):
+                best = parent, parent_airline, dist
+        if best is None:
+            return None, None, None
+        return self.return_dijkstra(start, stop, best[0], best[1], 'network')
+
+    def find_blended_path(self, start, stop, reliability=0.5):
+        """Find the flight path from city A to city B with the least blend of
+        cancellation rate and average delay. reliability is the share of the
+        cancellation rate in the blend, from 0 to 1.
+
+        The first query builds a contraction hierarchy of the network and every new
+        reliability only re-customizes its weights, so the queries stay fast while
+        the blend changes."""
+        s, t = self.__validate(start, stop)
+        if not self.reachability.reachable(s, t):
+            return None, None, None
+        if self.hierarchy is None:
+            self.hierarchy = ContractionHierarchy(self.network)
+        if self.hierarchy.reliability != reliability:
+            self.hierarchy.customize(reliability)
+        route = self.hierarchy.query(s, t)[1]
+        if route is None:
+            return None, None, None
+        return self.return_edges(route)
+
+    def find_k_flight_paths(self, start, stop, k=5, delay_or_cancel='cancel'):
+        """Find the best k flight paths from city A to city B that visit no airport
+        twice. Returns the routes from the best to the worst."""
+        s, t = self.__validate(start, stop)
+        if not self.reachability.reachable(s, t):
+            return []
+        adj = self.adj_delay if delay_or_cancel == 'delay' else self.adj_cancel
+        routes = self.k_shortest_paths(adj, s, t, k)
+        return [self.return_edges(route, adj) for route in routes]
+
+    def find_flight_path(self, start, stop, airlines=None, exclude=None, single_carrier=False,
+                         max_stops=None):
+        """Find the flight path from city A to city B. If max_stops is given, the route
+        changes flight at most max_stops times. If any airline filter is given,
+        see find_carrier_path()"""
+        if airlines or exclude or single_carrier:
+            return self.find_carrier_path(start, stop, airlines, exclude, single_carrier,
+                                          max_stops)
+        s, t = self.__validate(start, stop)
         direct_path = self.linear_search(self.adj_cancel, start, stop)
         if direct_path:
             direct_path2 = self.linear_search(self.adj_delay, start, stop)
@@ -148,9 +649,79 @@ class Pathfinder:
             if abs(direct_path[0] - direct_path2[0])*100 <= 5:
                 return self.return_linear(start, stop, direct_path2)
             return self.return_linear(start, stop, direct_path)
-        parent, parent_airline, dist = self.dijkstra(self.adj_cancel, start, 0)
-        parent2, parent_airline2, dist2 = self.dijkstra(self.adj_delay, start, 0)
+        if not self.reachability.reachable(s, t):
+            return None, None, None
+        return self.choose_path(start, stop, self.search('cancel', s, t, max_stops),
+                                self.search('delay', s, t, max_stops))
+
+    def choose_path(self, start, stop, cancel_tree, delay_tree):
+        """Chooses between the routes of the cancellation rate and the average delay
+        graphs. The trees are (parent, parent_airline, dist) as dijkstra() returns."""
+        t = self.airport_index[stop]
         # Compares the cancellation rate
-        if abs(dist[stop][0] - dist2[stop][0])*100 <= 5:
-            return self.return_dijkstra(start, stop, parent2, parent_airline2, 'delay')
-        return self.return_dijkstra(start, stop, parent, parent_airline, 'cancel')
+        if abs(float(cancel_tree[2][0, t]) - float(delay_tree[2][0, t]))*100 <= 5:
+            return self.return_dijkstra(start, stop, delay_tree[0], delay_tree[1], 'delay')
+        return self.return_dijkstra(start, stop, cancel_tree[0], cancel_tree[1], 'cancel')
+
+    def find_origin_paths(self, start, stops):
+        """Find the flight paths from city A to many cities. Only one search is run for
+        each graph, and every route is taken from the same shortest path trees.
+
+        Returns:
+            A list of rows in the format of BATCH_COLUMNS
+        """
+        rows = []
+        trees = None
+        for stop in stops:
+            flights = [None]
+            if start != stop and start in self.airport_index and stop in self.airport_index:
+                direct_path = self.linear_search(self.adj_cancel, start, stop)
+                if direct_path:
+                    flights = self.find_flight_path(start, stop)
+                elif self.reachability.reachable(self.airport_index[start],
+                                                 self.airport_index[stop]):
+                    if trees is None:
+                        trees = [self.path_cache.tree(name, self.airport_index[start])
+                                 if self.path_cache else
+                                 self.dijkstra(adj, self.airport_index[start], 0)
+                                 for name, adj in [('cancel', self.adj_cancel),
+                                                   ('delay', self.adj_delay)]]
+                    flights = self.choose_path(start, stop, trees[0], trees[1])
+            if None in flights:
+                rows.append([start, stop, 0] + [None] * 5)
+            else:
+                rows.extend([start, stop, leg] + flight
+                            for leg, flight in enumerate(flights, 1))
+        return rows
+
+    def find_flight_paths(self, pairs, processes=None):
+        """Find the flight paths of many (origin, destination) pairs, the same way as
+        find_flight_path(). Pairs are grouped by origin so that each origin is only
+        searched once. If processes is given, origins are spread across that many
+        worker processes.
+
+        Args:
+            pairs: A list of (origin, destination) tuples, or a DataFrame whose
+                first two columns are the origins and destinations
+
+        Returns:
+            A DataFrame with BATCH_COLUMNS and one row for each flight of each route.
+            Pairs without a route have one row with leg 0 and no flight.
+            Every pair is checked like in find_flight_path() before any search.
+        """
+        if isinstance(pairs, pd.DataFrame):
+            pairs = pairs.iloc[:, :2].itertuples(index=False)
+        by_origin = {}
+        for start, stop in pairs:
+            self.__validate(start, stop)
+            by_origin.setdefault(start, []).append(stop)
+
+        if processes:
+            with ProcessPoolExecutor(processes, initializer=init_worker,
+                                     initargs=(self,)) as executor:
+                results = list(executor.map(_find_origin_paths, by_origin,
+                                            by_origin.values()))
+        else:
+            results = [self.find_origin_paths(start, stops)
+                       for start, stops in by_origin.items()]
+        return pd.DataFrame([row for rows in results for row in rows], columns=BATCH_COLUMNS)
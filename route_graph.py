@@ -0,0 +1,189 @@
+"""A compact representation of the flight network used by the Pathfinder"""
+import numpy as np
+
+
+class RouteGraph:
+    """A directed graph of flight routes. Airports and airlines are interned
+    to integer ids and the edges are kept in compressed sparse row (CSR) arrays.
+
+    The outbound edges of airport u are the edges offsets[u] to offsets[u+1],
+    sorted by their target airport and airline. Each edge i goes to targets[i] with
+    cancellation rate cancel[i] and average delay delay[i] and is
+    operated by airline airline_ids[i]. The graph may be a multigraph, which
+    has one edge for each airline flying from the same origin to the same destination.
+    """
+    def __init__(self, airports, airlines, offsets, targets,
+                 cancel, delay, airline_ids) -> None:
+        self.airports = list(airports)
+        self.airlines = list(airlines)
+        self.airport_index = {name: i for i, name in enumerate(self.airports)}
+        self.airline_index = {name: i for i, name in enumerate(self.airlines)}
+        self.offsets = offsets
+        self.targets = targets
+        self.cancel = cancel
+        self.delay = delay
+        self.airline_ids = airline_ids
+        # Edges next to each other going to the same airport, but not across two rows
+        parallel = np.diff(targets) == 0
+        row_starts = offsets[1:-1]
+        parallel[row_starts[(row_starts > 0) & (row_starts < len(targets))] - 1] = False
+        self.multigraph = bool(parallel.any())
+        self.__reverse = None
+
+    @classmethod
+    def from_edges(cls, airports, airlines, sources, targets,
+                   cancel, delay, airline_ids):
+        """Creates a graph from edge arrays. sources and targets are airport ids
+        and airline_ids are indices of the airlines list."""
+        order = np.lexsort((airline_ids, targets, sources))
+        offsets = np.zeros(len(airports) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=len(airports)), out=offsets[1:])
+        return cls(airports, airlines, offsets,
+                   np.asarray(targets, dtype=np.int32)[order],
+                   np.asarray(cancel, dtype=np.float64)[order],
+                   np.asarray(delay, dtype=np.float64)[order],
+                   np.asarray(airline_ids, dtype=np.int32)[order])
+
+    def __len__(self) -> int:
+        """Returns the number of airports"""
+        return len(self.airports)
+
+    @property
+    def weights(self):
+        """Returns the weight arrays. 0 = cancellation rate, 1 = average delay in minutes"""
+        return self.cancel, self.delay
+
+    @property
+    def sources(self):
+        """Returns the origin airport id of each edge"""
+        return np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.offsets))
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the memory used by the edge arrays in bytes"""
+        return sum(array.nbytes for array in (self.offsets, self.targets, self.cancel,
+                                              self.delay, self.airline_ids))
+
+    def find_edge(self, u: int, v: int, airline: int = None) -> int:
+        """Returns the index of the edge from airport u to airport v, -1 if there isn't any.
+        If airline is given, only the edge operated by that airline id is returned."""
+        lo, hi = self.offsets[u], self.offsets[u+1]
+        first = lo + np.searchsorted(self.targets[lo:hi], v, side='left')
+        last = lo + np.searchsorted(self.targets[lo:hi], v, side='right')
+        for i in range(first, last):
+            if airline is None or self.airline_ids[i] == airline:
+                return int(i)
+        return -1
+
+    def airline_mask(self, include=None, exclude=None):
+        """Returns a boolean mask over the airline ids. If include is given, only those
+        airlines are allowed. Airlines in exclude are never allowed."""
+        if include:
+            mask = np.zeros(len(self.airlines), dtype=bool)
+            mask[[self.airline_index[name] for name in include
+                  if name in self.airline_index]] = True
+        else:
+            mask = np.ones(len(self.airlines), dtype=bool)
+        if exclude:
+            mask[[self.airline_index[name] for name in exclude
+                  if name in self.airline_index]] = False
+        return mask
+
+    def reverse(self):
+        """Returns the same graph with all edges reversed. It is only built once."""
+        if self.__reverse is None:
+            self.__reverse = RouteGraph.from_edges(self.airports, self.airlines,
+                                                   self.targets, self.sources,
+                                                   self.cancel, self.delay,
+                                                   self.airline_ids)
+        return self.__reverse
+
+
+class ReachabilityIndex:
+    """Answers whether one airport can be reached from another in O(1).
+
+    The strongly connected components of the graph are found with Tarjan's
+    Algorithm. For every component, the set of components it can reach is kept
+    as a row of bits, so a query is only a lookup of one bit.
+    """
+    def __init__(self, graph: RouteGraph) -> None:
+        self.component = self.strongly_connected_components(graph)
+        n = int(self.component.max()) + 1 if len(self.component) else 0
+        self.closure = np.zeros((n, (n + 7) // 8), dtype=np.uint8)
+        sources = self.component[graph.sources]
+        targets = self.component[graph.targets]
+        order = np.lexsort((targets, sources))
+        sources, targets = sources[order], targets[order]
+        offsets = np.searchsorted(sources, np.arange(n + 1))
+        # Tarjan's Algorithm numbers a component after all components it can reach
+        for c in range(n):
+            self.closure[c, c >> 3] |= np.uint8(1 << (c & 7))
+            successors = np.unique(targets[offsets[c]:offsets[c+1]])
+            successors = successors[successors != c]
+            if len(successors):
+                self.closure[c] |= np.bitwise_or.reduce(self.closure[successors], axis=0)
+
+    @staticmethod
+    def strongly_connected_components(graph: RouteGraph):
+        """Tarjan's Algorithm without recursion.
+
+        Returns:
+            The component id of every airport. Components are numbered in reverse
+            topological order.
+        """
+        n = len(graph)
+        offsets = graph.offsets.tolist()
+        targets = graph.targets.tolist()
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        component = np.full(n, -1, dtype=np.int32)
+        stack = []
+        count = 0
+        components = 0
+
+        for root in range(n):
+            if index[root] >= 0:
+                continue
+            work = [(root, offsets[root])]
+            index[root] = low[root] = count
+            count += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                u, edge = work[-1]
+                if edge < offsets[u+1]:
+                    work[-1] = (u, edge + 1)
+                    v = targets[edge]
+                    if index[v] < 0:
+                        index[v] = low[v] = count
+                        count += 1
+                        stack.append(v)
+                        on_stack[v] = True
+                        work.append((v, offsets[v]))
+                    elif on_stack[v]:
+                        low[u] = min(low[u], index[v])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[u])
+                if low[u] == index[u]:
+                    while True:
+                        v = stack.pop()
+                        on_stack[v] = False
+                        component[v] = components
+                        if v == u:
+                            break
+                    components += 1
+        return component
+
+    def reachable(self, s: int, t: int) -> bool:
+        """Returns True if airport id t can be reached from airport id s"""
+        c = self.component[t]
+        return bool(self.closure[self.component[s], c >> 3] >> (c & 7) & 1)
+
+    def reachable_from(self, s: int):
+        """Returns a boolean mask of the airport ids that can be reached from airport id s"""
+        bits = np.unpackbits(self.closure[self.component[s]], bitorder='little')
+        return bits[self.component].astype(bool)
@@ -8,6 +8,7 @@ class SidePanel(tk.Frame):
         super().__init__(master, cnf, **kwargs)
         self.__selectors = {}
         self.__buttons = {}
+        self.__scales = {}
         self.__padding = {'pady':10}
         self.history_box = None
 
@@ -83,6 +84,21 @@ class SidePanel(tk.Frame):
         """bind a button to a specific function"""
         self.__buttons[name].bind('<Button>', func)
 
+    def create_scale(self, name, from_=0, to=100, value=50):
+        """Creates a horizontal slider"""
+        scale = tk.Scale(self, label=name, from_=from_, to=to, orient='horizontal')
+        scale.set(value)
+        self.__scales[name] = scale
+        scale.pack(self.__padding)
+
+    def bind_scale(self, name, func):
+        """Bind a slider. The function gets the new value whenever the slider moves."""
+        self.__scales[name]['command'] = lambda value: func(int(value))
+
+    def get_scale_value(self, name):
+        """Get the value of a slider"""
+        return self.__scales[name].get()
+
     def hide_button(self, name):
         self.__buttons[name].pack_forget()
 
@@ -0,0 +1,112 @@
+"""Builds the Data Storytelling dashboard and keeps it next to the dataset"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import pandas as pd
+from digest import file_digest
+
+# Bump when the layout of the payload changes, so old files are rebuilt
+PAYLOAD_FORMAT = 2
+
+
+def run_pipeline(tasks: dict, workers: int = None) -> dict:
+    """Runs tasks that depend on each other in a thread pool.
+
+    tasks maps a name to (function, names of the tasks it needs). Each function is
+    called with the results of the tasks it needs, in that order, as soon as all of
+    them are done, so tasks that don't depend on each other run at the same time.
+
+    Returns:
+        A dict of the result of every task
+    """
+    results = {}
+    waiting = dict(tasks)
+    running = {}
+    with ThreadPoolExecutor(workers) as executor:
+        while waiting or running:
+            for name, (func, needs) in list(waiting.items()):
+                if all(need in results for need in needs):
+                    del waiting[name]
+                    future = executor.submit(func, *[results[need] for need in needs])
+                    running[future] = name
+            if not running:
+                raise ValueError(f'Tasks with missing dependencies: {list(waiting)}')
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+
+def _array(values) -> np.ndarray:
+    """Returns values as an array that np.load reads without pickle"""
+    array = np.asarray(values)
+    return array.astype(str) if array.dtype == object else array
+
+
+def pack(value, name: str, arrays: dict):
+    """Splits a payload of lists, tuples, Series, DataFrames and JSON values into
+    arrays, which are added to arrays under keys starting with name.
+
+    Returns:
+        The JSON layout that unpack() rebuilds the payload from
+    """
+    if isinstance(value, pd.Series):
+        arrays[f'{name}.values'] = _array(value)
+        arrays[f'{name}.index'] = _array(value.index)
+        return {'series': name, 'name': value.name}
+    if isinstance(value, pd.DataFrame):
+        for i, column in enumerate(value.columns):
+            arrays[f'{name}.{i}'] = _array(value[column])
+        arrays[f'{name}.index'] = _array(value.index)
+        return {'frame': name, 'columns': list(value.columns)}
+    if isinstance(value, (list, tuple)):
+        items = [pack(item, f'{name}.{i}', arrays) for i, item in enumerate(value)]
+        return {'tuple' if isinstance(value, tuple) else 'list': items}
+    return {'value': value}
+
+
+def unpack(layout: dict, arrays):
+    """Rebuilds a payload from its layout and arrays (see pack())"""
+    if 'series' in layout:
+        name = layout['series']
+        return pd.Series(arrays[f'{name}.values'], index=arrays[f'{name}.index'],
+                         name=layout['name'])
+    if 'frame' in layout:
+        name = layout['frame']
+        return pd.DataFrame({column: arrays[f'{name}.{i}']
+                             for i, column in enumerate(layout['columns'])},
+                            index=arrays[f'{name}.index'])
+    if 'tuple' in layout:
+        return tuple(unpack(item, arrays) for item in layout['tuple'])
+    if 'list' in layout:
+        return [unpack(item, arrays) for item in layout['list']]
+    return layout['value']
+
+
+class StorytellingCache:
+    """The finished storytelling payload of a dataset, saved in a .npz file next to
+    it together with the hash of the dataset, so later launches don't rebuild it.
+    The numbers are stored as plain arrays and the rest as JSON, so loading the
+    file never runs code. If the hash is not given, it is computed from the dataset."""
+    def __init__(self, source: str, digest: str = None) -> None:
+        self.source = source
+        self.path = os.path.splitext(source)[0] + '.storytelling.npz'
+        self.digest = digest or file_digest(source)
+
+    def load(self):
+        """Returns the saved payload, None if there is none for this dataset"""
+        try:
+            with np.load(self.path) as file:
+                if int(file['format']) != PAYLOAD_FORMAT or str(file['digest']) != self.digest:
+                    return None
+                return unpack(json.loads(str(file['layout'])), file)
+        except (OSError, KeyError, TypeError, ValueError):
+            return None
+
+    def save(self, payload) -> None:
+        """Saves the payload next to the dataset"""
+        arrays = {}
+        layout = json.dumps(pack(payload, 'payload', arrays))
+        with open(self.path, 'wb') as file:
+            np.savez(file, format=PAYLOAD_FORMAT, digest=self.digest, layout=layout, **arrays)
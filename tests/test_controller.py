@@ -0,0 +1,183 @@
+"""Tests of the Controller with a fake view, side panel and executor"""
+from unittest import mock
+import pytest
+import controller
+from controller import Controller
+
+BAR = 'average_delay_mins'
+
+
+class FakeSelector:
+    """A selector that keeps its options and selected value"""
+    def __init__(self, label):
+        self.label = label
+        self.options = []
+        self.selected = ''
+        self.state = 'readonly'
+
+    @property
+    def val(self):
+        return self.selected
+
+    @val.setter
+    def val(self, options):
+        self.options = options
+        self.selected = ''
+
+    def set_selected(self, value):
+        self.selected = value
+
+    def set_state(self, state):
+        self.state = state
+
+
+class FakeHistoryBox:
+    """A history box that only keeps its values"""
+    def __init__(self):
+        self.values = []
+
+    def append(self, value):
+        self.values.append(value)
+
+    def remove(self, value):
+        self.values.remove(value)
+
+
+class FakePanel:
+    """The side panel of a bar graph"""
+    def __init__(self):
+        self.selectors = {label: FakeSelector(label) for label in
+                          ['Origin (Optional)', 'Destination (Optional)', 'Airline']}
+        self.buttons = {'ADD': 'disabled', 'REMOVE': 'disabled', 'PLOT': 'normal'}
+        self.history_box = FakeHistoryBox()
+        self.has_history_box = True
+
+    def __iter__(self):
+        return iter(self.selectors.values())
+
+    def get_selector(self, name):
+        return self.selectors[name]
+
+    def get_next_selector(self, name):
+        labels = list(self.selectors)
+        index = labels.index(name) + 1
+        return self.selectors[labels[index]] if index < len(labels) else None
+
+    def disable_next_selectors(self, name):
+        labels = list(self.selectors)
+        for label in labels[labels.index(name) + 1:]:
+            self.selectors[label].set_state('disabled')
+
+    def get_selector_options(self):
+        return {label: selector.val for label, selector in self.selectors.items()}
+
+    def get_button_state(self, name):
+        return self.buttons[name]
+
+    def set_button_state(self, name, state):
+        self.buttons[name] = state
+
+
+class FakeGraph:
+    """A bar graph that remembers what it plotted"""
+    def __init__(self):
+        self.side_panel = FakePanel()
+        self.canvas_size = (640, 480)
+        self.plotted = []
+        self.resets = 0
+
+    def plot_graph(self, data, title):
+        self.plotted.append(data)
+
+    def capture_next_draw(self, callback):
+        pass
+
+    def reset_canvas(self):
+        self.resets += 1
+
+    def set_busy(self, busy):
+        pass
+
+
+class FakeExecutor:
+    """Runs tasks only when run() is called. A newer task or invalidate() drops the
+    pending task of a channel, like TaskExecutor."""
+    def __init__(self):
+        self.pending = {}
+
+    def submit(self, channel, func, *args, callback=None, error=None, busy=None):
+        self.pending[channel] = (func, args, callback)
+
+    def invalidate(self, channel):
+        self.pending.pop(channel, None)
+
+    def run(self):
+        pending, self.pending = self.pending, {}
+        for func, args, callback in pending.values():
+            callback(func(*args))
+
+
+def fake_view(graph):
+    """A view with one bar graph tab. Its idle callbacks are kept in idle_callbacks."""
+    view = mock.MagicMock()
+    view.idle_callbacks = []
+    view.get_all_graphs.return_value = []
+    view.get_current_graph.return_value = graph
+    view.get_current_tab_name.return_value = BAR
+    view.after_idle.side_effect = lambda callback: view.idle_callbacks.append(callback)
+    return view
+
+
+def idle(view):
+    """Runs the idle callbacks of the view"""
+    callbacks, view.idle_callbacks = view.idle_callbacks, []
+    for callback in callbacks:
+        callback()
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """A Controller of a fake view, with a model that plots the selected airlines"""
+    monkeypatch.setattr(controller, 'Pathfinder', lambda df: None)
+    graph = FakeGraph()
+    view = fake_view(graph)
+    model = mock.MagicMock(version=0)
+    model.get_selector_data.return_value = ['A', 'B']
+    model.get_selectors_data.side_effect = lambda queries: {name: ['A', 'B']
+                                                            for name in queries}
+    model.get_graph_data.side_effect = lambda name, options: (list(options['airline']), name)
+    app = Controller(view, model)
+    app.executor.shutdown()
+    app.executor = FakeExecutor()
+    return app, view, graph
+
+
+def pick(app, view, graph, label, value):
+    """Selects a value the way the bound Tk event would"""
+    graph.side_panel.get_selector(label).set_selected(value)
+    if label == 'Airline':
+        app.airlines_selected(None)
+    else:
+        app.selector_selected(label)
+    idle(view)
+
+
+def test_picking_an_airline_keeps_the_plot_started_by_add(app):
+    app, view, graph = app
+    pick(app, view, graph, 'Airline', 'A')
+    app.add_to_history_box(None)
+    pick(app, view, graph, 'Airline', 'B')
+    app.executor.run()
+    assert graph.side_panel.history_box.values == ['A']
+    assert graph.plotted == [['A']]
+
+
+def test_picking_an_origin_drops_the_pending_plot(app):
+    app, view, graph = app
+    pick(app, view, graph, 'Airline', 'A')
+    app.add_to_history_box(None)
+    pick(app, view, graph, 'Origin (Optional)', 'A')
+    app.executor.run()
+    assert graph.side_panel.history_box.values == []
+    assert graph.plotted == []
+    assert graph.resets == 1
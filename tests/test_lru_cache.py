@@ -0,0 +1,26 @@
+"""Tests of the LRUCache bounded by the number of results and by their bytes"""
+import numpy as np
+from lru_cache import LRUCache
+
+
+def test_drops_the_least_recently_used_key():
+    cache = LRUCache(2)
+    for key in ['a', 'b', 'a', 'c']:
+        cache.get(key, lambda key=key: key.upper())
+    assert 'a' in cache and 'b' not in cache and 'c' in cache
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 3
+
+
+def test_bounds_the_bytes_of_the_results():
+    cache = LRUCache(None, sizeof=lambda image: image.nbytes, maxbytes=100)
+    for key in range(4):
+        cache.put(key, np.zeros(40, dtype=np.uint8))
+    assert cache.lookup(1) is None
+    assert [key in cache for key in range(4)] == [False, False, True, True]
+    assert cache.nbytes == 80
+    cache.put(2, np.zeros(10, dtype=np.uint8))
+    assert cache.nbytes == 50
+    cache.put(4, np.zeros(101, dtype=np.uint8))
+    assert 4 not in cache and cache.nbytes == 50
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
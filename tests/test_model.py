@@ -0,0 +1,80 @@
+"""Tests of the selector index and the aggregate cube of the Model against plain
+pandas filters and groupbys on small synthetic datasets"""
+from itertools import product
+import numpy as np
+import pandas as pd
+import pytest
+from model import AVERAGE_COLUMNS, CUBE_COLUMNS, ROUTE_COLUMNS, AggregateCube, FacetIndex
+
+SEEDS = range(10)
+
+
+def synthetic_frame(seed, rows=60):
+    """Returns a random dataset with sorted categories, like Model.load() makes them.
+    Some averages are missing and some categories have no rows."""
+    rng = np.random.default_rng(seed)
+    names = {'airline_name': ['L0', 'L1', 'L2', 'L3'],
+             'reporting_airport': ['A0', 'A1', 'A2'],
+             'origin_destination': ['A3', 'A4', 'A5', 'A6'],
+             'origin_destination_country': ['C0', 'C1']}
+    df = pd.DataFrame({column: pd.Categorical(rng.choice(values[:-1], rows), categories=values)
+                       for column, values in names.items()})
+    df['number_flights_matched'] = rng.integers(1, 50, rows)
+    df['number_flights_cancelled'] = rng.integers(0, 5, rows)
+    for column in AVERAGE_COLUMNS:
+        values = rng.integers(0, 60, rows).astype(float)
+        values[rng.random(rows) < 0.2] = np.nan
+        df[column] = values
+    return df
+
+
+def matching(df, filters):
+    """The rows of df that match filters, the way AggregateCube.mask() reads them"""
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in filters.items():
+        if values:
+            mask &= df[column].isin([values] if isinstance(values, str) else values)
+    return df[mask]
+
+
+FILTERS = [{}, {'airline_name': 'L1'}, {'reporting_airport': ['A0', 'A2']},
+           {'airline_name': ['L0', 'L2'], 'origin_destination': 'A4'},
+           {'airline_name': 'L3'}, {'reporting_airport': 'ZZZ'}]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_facet_index_matches_filters(seed):
+    df = synthetic_frame(seed)
+    facets = FacetIndex(df)
+    choices = [[''] + list(df[column].cat.categories) for column in ROUTE_COLUMNS]
+    for key in product(*choices):
+        rows = matching(df, dict(zip(ROUTE_COLUMNS, key)))
+        for column in ROUTE_COLUMNS:
+            assert facets.get(column, *key) == sorted(set(rows[column].astype(str)))
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('filters', FILTERS)
+def test_aggregate_cube_matches_groupby(seed, filters):
+    df = synthetic_frame(seed)
+    cube = AggregateCube(df)
+    rows = matching(df, filters)
+    total = cube.total(['rows', 'number_flights_matched'], filters)
+    assert total['rows'] == len(rows)
+    assert total['number_flights_matched'] == rows['number_flights_matched'].sum()
+    flights = rows['number_flights_matched']
+    for by in CUBE_COLUMNS:
+        groups = rows.groupby(by, observed=True)
+        rollup = cube.rollup(by, ['number_flights_cancelled'], filters)
+        assert list(rollup.index) == list(groups.size().index)
+        np.testing.assert_allclose(rollup['number_flights_cancelled'],
+                                   groups['number_flights_cancelled'].sum())
+        for column in AVERAGE_COLUMNS:
+            mean = groups[column].mean()
+            np.testing.assert_allclose(cube.mean(column, by, filters), mean)
+            valid = rows[column].notna()
+            weighted = (rows[column] * flights)[valid].groupby(rows[by][valid],
+                                                                observed=True).sum() / \
+                flights[valid].groupby(rows[by][valid], observed=True).sum()
+            np.testing.assert_allclose(cube.weighted_mean(column, by, filters),
+                                       weighted.reindex(mean.index))
@@ -0,0 +1,263 @@
+"""Tests of the route searches of the Pathfinder against exhaustive search on small
+synthetic flight networks"""
+import numpy as np
+import pandas as pd
+import pytest
+from contraction import ContractionHierarchy
+from pathfinder import BATCH_COLUMNS, Pathfinder
+
+SEEDS = range(20)
+
+
+def synthetic_frame(seed, airports=12, routes=45, airlines=3):
+    """Returns a random dataset with the columns the Pathfinder reads. Some routes
+    are flown by more than one airline. The weights are whole numbers, so the sums
+    of tied routes are exactly equal and the other weight breaks the tie."""
+    rng = np.random.default_rng(seed)
+    origins = rng.integers(0, airports, routes)
+    destinations = rng.integers(0, airports, routes)
+    keep = origins != destinations
+    return pd.DataFrame({
+        'reporting_airport': [f'A{i}' for i in origins[keep]],
+        'origin_destination': [f'A{i}' for i in destinations[keep]],
+        'airline_name': [f'L{i}' for i in rng.integers(0, airlines, keep.sum())],
+        'flights_cancelled_percent': rng.integers(0, 5, keep.sum()).astype(float),
+        'average_delay_mins': rng.integers(0, 60, keep.sum()).astype(float),
+    })
+
+
+def simple_paths(graph, s, t, max_legs=None):
+    """Every loopless route from s to t as a list of edge ids of graph"""
+    paths = []
+    stack = [(s, [s], [])]
+    while stack:
+        u, nodes, edges = stack.pop()
+        if u == t:
+            paths.append(edges)
+            continue
+        if max_legs is not None and len(edges) >= max_legs:
+            continue
+        for e in range(graph.offsets[u], graph.offsets[u+1]):
+            v = int(graph.targets[e])
+            if v not in nodes:
+                stack.append((v, nodes + [v], edges + [e]))
+    return paths
+
+
+def cost(graph, edges, index=0):
+    """The (index weight, other weight) of a route, compared lexicographically"""
+    weights = graph.weights
+    return (sum(weights[index][edges].tolist()),
+            sum(weights[(index+1) % 2][edges].tolist()))
+
+
+def best_cost(graph, s, t, index=0, max_legs=None):
+    """The cost of the best route by exhaustive search, None if there is no route"""
+    costs = [cost(graph, path, index) for path in simple_paths(graph, s, t, max_legs)]
+    return min(costs) if costs else None
+
+
+def tree_cost(graph, parent, parent_airline, s, t, index=0):
+    """The cost of the route to t described by the parent pointers"""
+    edges = []
+    while t != s:
+        u = int(parent[t])
+        assert u >= 0
+        edges.append(graph.find_edge(u, t, parent_airline[t]))
+        t = u
+    return cost(graph, edges[::-1], index)
+
+
+def pairs(pathfinder):
+    """Every pair of different airport ids that can fly out"""
+    n = len(pathfinder.airports)
+    return [(s, t) for s in range(n) for t in range(n)
+            if s != t and pathfinder.adj_cancel.offsets[s] < pathfinder.adj_cancel.offsets[s+1]]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('index', [0, 1])
+def test_dijkstra_matches_exhaustive_search(seed, index):
+    pathfinder = Pathfinder(synthetic_frame(seed))
+    adj = pathfinder.adj_cancel if index == 0 else pathfinder.adj_delay
+    for s, t in pairs(pathfinder):
+        expected = best_cost(adj, s, t, index)
+        full = pathfinder.dijkstra(adj, s, index)
+        stopped = pathfinder.dijkstra(adj, s, index, target=t)
+        both = pathfinder.bidirectional_dijkstra(adj, s, t, index)
+        for parent, parent_airline, dist in [full, stopped, both]:
+            if expected is None:
+                assert dist[index, t] == np.inf
+                continue
+            other = (index+1) % 2
+            assert (dist[index, t], dist[other, t]) == pytest.approx(expected)
+            assert tree_cost(adj, parent, parent_airline, s, t, index) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_search_stats_count_settled_airports(seed):
+    pathfinder = Pathfinder(synthetic_frame(seed))
+    adj = pathfinder.adj_cancel
+    for s, t in pairs(pathfinder):
+        searches = pathfinder.search_stats['searches']
+        dist = pathfinder.dijkstra(adj, s)[2]
+        full = pathfinder.search_stats['last_settled']
+        assert full == np.count_nonzero(dist[0] < np.inf)
+        pathfinder.dijkstra(adj, s, target=t)
+        assert pathfinder.search_stats['last_settled'] <= full
+        pathfinder.bidirectional_dijkstra(adj, s, t)
+        assert pathfinder.search_stats['searches'] == searches + 3
+    stats = pathfinder.search_stats
+    assert stats['settled'] >= stats['searches'] > 0
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('max_legs', [1, 2, 3])
+def test_bounded_search_matches_exhaustive_search(seed, max_legs):
+    pathfinder = Pathfinder(synthetic_frame(seed))
+    adj = pathfinder.adj_cancel
+    for s, t in pairs(pathfinder):
+        expected = best_cost(adj, s, t, max_legs=max_legs)
+        parent, parent_airline, dist = pathfinder.bounded_search(adj, s, t, max_legs)
+        if expected is None:
+            assert dist[0, t] == np.inf
+            continue
+        assert (dist[0, t], dist[1, t]) == pytest.approx(expected)
+        assert tree_cost(adj, parent, parent_airline, s, t) == pytest.approx(expected)
+
+
+def frontier(labels):
+    """The distinct labels that no other label is at least as good as in every value"""
+    labels = sorted(set(labels))
+    return [label for label in labels
+            if not any(other != label and all(np.array(other) <= np.array(label))
+                       for other in labels)]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('max_legs', [None, 2])
+def test_pareto_search_matches_exhaustive_search(seed, max_legs):
+    pathfinder = Pathfinder(synthetic_frame(seed))
+    network = pathfinder.network
+    for s, t in pairs(pathfinder):
+        expected = frontier([tuple(round(value, 6) for value in cost(network, path))
+                             + (len(path),)
+                             for path in simple_paths(network, s, t, max_legs)])
+        routes = pathfinder.pareto_search(s, t, max_legs)
+        found = sorted(tuple(round(value, 6) for value in cost(network, route))
+                       + (len(route),) for route in routes)
+        assert found == expected
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('k', [1, 3, 5])
+def test_k_shortest_paths_matches_exhaustive_search(seed, k):
+    pathfinder = Pathfinder(synthetic_frame(seed))
+    adj = pathfinder.adj_cancel
+    for s, t in pairs(pathfinder):
+        paths = simple_paths(adj, s, t)
+        expected = sorted(cost(adj, path) for path in paths)[:k]
+        routes = pathfinder.k_shortest_paths(adj, s, t, k)
+        assert len(routes) == len(expected)
+        assert len({tuple(route) for route in routes}) == len(routes)
+        assert all(route in paths for route in routes)
+        for route, best in zip(routes, expected):
+            assert cost(adj, route) == pytest.approx(best)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_k_shortest_paths_out_of_budget(seed):
+    pathfinder = Pathfinder(synthetic_frame(seed))
+    adj = pathfinder.adj_cancel
+    for s, t in pairs(pathfinder):
+        assert pathfinder.k_shortest_paths(adj, s, t, 5, max_settled=1) == []
+        routes = pathfinder.k_shortest_paths(adj, s, t, 5, max_settled=len(pathfinder.airports))
+        best = best_cost(adj, s, t)
+        assert routes == [] if best is None else cost(adj, routes[0]) == best
+
+
+def reachable(graph, s):
+    """The airport ids that can be reached from s, by breadth first search"""
+    seen = {s}
+    queue = [s]
+    for u in queue:
+        for v in graph.targets[graph.offsets[u]:graph.offsets[u+1]].tolist():
+            if v not in seen:
+                seen.add(v)
+                queue.append(v)
+    return seen
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_reachability_matches_breadth_first_search(seed):
+    pathfinder = Pathfinder(synthetic_frame(seed, routes=20))
+    network = pathfinder.network
+    for s in range(len(pathfinder.airports)):
+        expected = reachable(network, s)
+        mask = pathfinder.reachability.reachable_from(s)
+        assert set(np.flatnonzero(mask).tolist()) == expected
+        assert all(pathfinder.reachability.reachable(s, t) == (t in expected)
+                   for t in range(len(pathfinder.airports)))
+        assert pathfinder.reachable_airports(pathfinder.airports[s]) == \
+            sorted(pathfinder.airports[t] for t in expected - {s})
+
+
+def blended(graph, reliability):
+    """The cost of every edge that ContractionHierarchy.customize() sets"""
+    scales = [array.mean() if array.mean() > 0 else 1.0 for array in graph.weights]
+    return reliability * graph.cancel / scales[0] + (1 - reliability) * graph.delay / scales[1]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_contraction_hierarchy_matches_exhaustive_search(seed):
+    pathfinder = Pathfinder(synthetic_frame(seed))
+    network = pathfinder.network
+    hierarchy = ContractionHierarchy(network)
+    for reliability in [0.0, 0.3, 1.0]:
+        hierarchy.customize(reliability)
+        weights = blended(network, reliability)
+        for s, t in pairs(pathfinder):
+            costs = [sum(weights[path].tolist()) for path in simple_paths(network, s, t)]
+            best, route = hierarchy.query(s, t)
+            if not costs:
+                assert best == np.inf and route is None
+                continue
+            assert best == pytest.approx(min(costs))
+            assert sum(weights[route].tolist()) == pytest.approx(best)
+            # Routes through airports with no cost may pass an airport twice
+            sources = np.searchsorted(network.offsets, route, side='right') - 1
+            assert sources.tolist() == [s] + network.targets[route[:-1]].tolist()
+            assert network.targets[route[-1]] == t
+
+
+def batch_rows(pathfinder, start, stop):
+    """The rows of find_flight_paths() for one pair, from find_flight_path()"""
+    flights = pathfinder.find_flight_path(start, stop)
+    if None in flights:
+        return [[start, stop, 0] + [None] * 5]
+    return [[start, stop, leg] + flight for leg, flight in enumerate(flights, 1)]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_find_flight_paths_matches_single_queries(seed):
+    pathfinder = Pathfinder(synthetic_frame(seed))
+    names = [(pathfinder.airports[s], pathfinder.airports[t]) for s, t in pairs(pathfinder)]
+    expected = pd.DataFrame([row for start, stop in names
+                             for row in batch_rows(pathfinder, start, stop)],
+                            columns=BATCH_COLUMNS)
+    # Grouped by origin, in the order each origin first appears
+    order = {start: i for i, (start, _) in reversed(list(enumerate(names)))}
+    expected = expected.iloc[np.argsort([order[start] for start in expected['start']],
+                                        kind='stable')].reset_index(drop=True)
+    pd.testing.assert_frame_equal(pathfinder.find_flight_paths(names), expected)
+    frame = pd.DataFrame(names, columns=['origin', 'destination'])
+    pd.testing.assert_frame_equal(pathfinder.find_flight_paths(frame), expected)
+
+
+def test_find_flight_paths_across_processes():
+    pathfinder = Pathfinder(synthetic_frame(0))
+    names = [(pathfinder.airports[s], pathfinder.airports[t]) for s, t in pairs(pathfinder)]
+    pd.testing.assert_frame_equal(pathfinder.find_flight_paths(names, processes=2),
+                                  pathfinder.find_flight_paths(names))
+    with pytest.raises(ValueError):
+        pathfinder.find_flight_paths(names + [(names[0][0], names[0][0])])
@@ -0,0 +1,73 @@
+"""Tests of the storytelling pipeline and the file it is saved in"""
+import numpy as np
+import pandas as pd
+import pytest
+from storytelling import StorytellingCache, run_pipeline
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'flights.csv'
+    path.write_text('a,b\n1,2\n')
+    return str(path)
+
+
+def payload():
+    """A payload of the same shape as Model.data_storytelling()"""
+    series = pd.Series([0.5, np.nan, 2.0], index=[8, 10, 11], name='average_delay_mins')
+    frame = pd.DataFrame({'Interval': ['0-15', '15-30'], 'Percent': [60.0, 40.0]},
+                         index=[1, 2])
+    bars = (pd.Series(['A', 'B'], name='airline_name'),
+            pd.Series([1.5, 2.5], name='flights_cancelled_percent'))
+    return [[series, 'Box'], [frame, 'Hist\nTitle'], [bars, 'Bar']], \
+        ({'count': 3.0, 'mean': 1.25}, 'Stats')
+
+
+def test_run_pipeline_passes_results_to_dependent_tasks():
+    results = run_pipeline({'a': (lambda: 2, []),
+                            'b': (lambda a: a * 3, ['a']),
+                            'c': (lambda a, b: a + b, ['a', 'b'])})
+    assert results == {'a': 2, 'b': 6, 'c': 8}
+
+
+def test_run_pipeline_rejects_missing_dependencies():
+    with pytest.raises(ValueError):
+        run_pipeline({'a': (lambda b: b, ['b'])})
+
+
+def test_cache_round_trip(source):
+    cache = StorytellingCache(source)
+    assert cache.load() is None
+    cache.save(payload())
+    graphs, desc = StorytellingCache(source).load()
+    expected_graphs, expected_desc = payload()
+    assert desc == expected_desc
+    series, frame, bars = (graph for graph, _ in graphs)
+    assert [title for _, title in graphs] == [title for _, title in expected_graphs]
+    pd.testing.assert_series_equal(series, expected_graphs[0][0])
+    pd.testing.assert_frame_equal(frame, expected_graphs[1][0])
+    assert isinstance(bars, tuple)
+    for got, want in zip(bars, expected_graphs[2][0]):
+        pd.testing.assert_series_equal(got, want, check_index_type=False)
+
+
+def test_cache_is_dropped_when_the_dataset_changes(source):
+    StorytellingCache(source).save(payload())
+    with open(source, 'a', encoding='utf-8') as file:
+        file.write('3,4\n')
+    assert StorytellingCache(source).load() is None
+
+
+def test_cache_never_unpickles(source):
+    cache = StorytellingCache(source)
+    cache.save(payload())
+    with open(cache.path, 'wb') as file:
+        np.savez(file, format=np.array([{'evil': True}], dtype=object))
+    assert cache.load() is None
+
+
+def test_cache_is_keyed_by_the_given_digest(source):
+    StorytellingCache(source, digest='january').save(payload())
+    assert StorytellingCache(source, digest='january').load() is not None
+    assert StorytellingCache(source, digest='february').load() is None
+    assert StorytellingCache(source).load() is None